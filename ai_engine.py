@@ -5,7 +5,33 @@ No heavy models — uses pure Python for speed.
 
 import re
 import math
+from array import array
+from bisect import bisect_left
 from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import accumulate, repeat
+
+import perf
+
+# numpy, scipy and scikit-learn take about a second to import, so they load on first use
+np = sparse = DictVectorizer = TfidfTransformer = None
+HAS_SKLEARN: bool | None = None  # Unknown until _load_sklearn() runs
+
+
+def _load_sklearn() -> bool:
+    """Import the vectorized backends once; False if they are not installed."""
+    global np, sparse, DictVectorizer, TfidfTransformer, HAS_SKLEARN
+    if HAS_SKLEARN is None:
+        try:
+            import numpy as np
+            from scipy import sparse
+            from sklearn.feature_extraction import DictVectorizer
+            from sklearn.feature_extraction.text import TfidfTransformer
+            HAS_SKLEARN = True
+        except ImportError:
+            HAS_SKLEARN = False
+    return HAS_SKLEARN
 
 
 STOPWORDS = {
@@ -25,28 +51,105 @@ STOPWORDS = {
 }
 
 
-def generate_summary(text: str, num_sentences: int = 5) -> str:
+WORD_RE = re.compile(r'\b[a-zA-Z]+\b')
+SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+')
+STAT_SENTENCE_RE = re.compile(r'[.!?]+')
+VOWEL_GROUP_RE = re.compile(r'[aeiouy]+')
+MIN_TERM_LEN = 4
+SUMMARY_METHODS = ("frequency", "textrank")  # Sentence rankings generate_summaries_batch accepts
+
+
+@lru_cache(maxsize=65536)
+def _syllables(word: str) -> int:
+    return max(len(VOWEL_GROUP_RE.findall(word)), 1)
+
+
+@dataclass
+class TextAnalysis:
+    """Everything the engine needs from a text, tokenized in a single pass.
+
+    Build one with `analyze(text)` and pass it to `generate_summary`,
+    `extract_keywords`, `estimate_reading_time`, `compute_reading_stats`
+    or `analytics.frequent_terms_chart` instead of the raw string.
+    """
+    text: str
+    word_count: int = 0              # Whitespace-separated words
+    stat_sentence_count: int = 0     # Sentences as counted for Flesch-Kincaid
+    syllables: int = 0
+    term_counts: Counter = field(default_factory=Counter)  # Non-stopword terms, 4+ letters
+    terms: list[str] = field(default_factory=list)          # Lowercased 4+ letter words, in order
+    term_offsets: list[int] = field(default_factory=list)
+    sentence_spans: list[tuple[int, int]] = field(default_factory=list)  # Summary candidates
+
+    def sentence(self, span: tuple[int, int]) -> str:
+        return self.text[span[0]:span[1]].strip()
+
+    def sentence_terms(self, span: tuple[int, int]) -> list[str]:
+        lo = bisect_left(self.term_offsets, span[0])
+        hi = bisect_left(self.term_offsets, span[1])
+        return self.terms[lo:hi]
+
+
+def analyze(text: str) -> TextAnalysis:
+    """Tokenize a text once into a reusable TextAnalysis."""
+    if isinstance(text, TextAnalysis):
+        return text
+    text = text or ""
+    a = TextAnalysis(text=text)
+    a.word_count = len(text.split())
+    a.stat_sentence_count = sum(1 for s in STAT_SENTENCE_RE.split(text) if len(s.strip()) > 3)
+
+    word_counts = Counter()
+    for m in WORD_RE.finditer(text):
+        w = m.group().lower()
+        word_counts[w] += 1
+        if len(w) >= MIN_TERM_LEN:
+            a.terms.append(w)
+            a.term_offsets.append(m.start())
+    a.syllables = sum(n * _syllables(w) for w, n in word_counts.items())
+    a.term_counts = Counter(w for w in a.terms if w not in STOPWORDS)
+
+    # Summary sentences: split on whitespace after terminal punctuation
+    start = len(text) - len(text.lstrip())
+    end = len(text.rstrip())
+    for m in SENTENCE_BREAK_RE.finditer(text, start, end):
+        a.sentence_spans.append((start, m.start()))
+        start = m.end()
+    if start < end:
+        a.sentence_spans.append((start, end))
+    return a
+
+
+EARLY_SENTENCES, EARLY_BOOST = 3, 1.3
+TEXTRANK_DAMPING, TEXTRANK_ITERATIONS = 0.85, 30
+
+
+def _summary_candidates(a: TextAnalysis) -> tuple[list[tuple[int, int]], list[str]]:
+    spans = [sp for sp in a.sentence_spans if 20 < len(a.sentence(sp)) < 500]
+    return spans, [a.sentence(sp) for sp in spans]
+
+
+@perf.timed("summarize")
+def generate_summary(text: str | TextAnalysis, num_sentences: int = 5) -> str:
     """Fast extractive summary using sentence scoring."""
-    if not text or len(text.strip()) < 50:
+    a = analyze(text)
+    if not a.text or len(a.text.strip()) < 50:
         return "No content available."
 
-    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
-    sentences = [s.strip() for s in sentences if 20 < len(s.strip()) < 500]
+    spans, sentences = _summary_candidates(a)
 
     if len(sentences) <= num_sentences:
         return ' '.join(sentences[:num_sentences])
 
     # Word frequency scoring
-    words = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
-    freq = Counter(w for w in words if w not in STOPWORDS)
+    freq = a.term_counts
     max_freq = max(freq.values()) if freq else 1
 
     scored = []
-    for i, sent in enumerate(sentences):
-        sent_words = re.findall(r'\b[a-zA-Z]{4,}\b', sent.lower())
-        score = sum(freq.get(w, 0) / max_freq for w in sent_words)
-        if i < 3:
-            score *= 1.3  # Boost early sentences
+    for i, (sent, span) in enumerate(zip(sentences, spans)):
+        score = sum(freq.get(w, 0) / max_freq for w in a.sentence_terms(span))
+        if i < EARLY_SENTENCES:
+            score *= EARLY_BOOST  # Boost early sentences
         scored.append((i, sent, score))
 
     top = sorted(scored, key=lambda x: x[2], reverse=True)[:num_sentences]
@@ -54,18 +157,154 @@ def generate_summary(text: str, num_sentences: int = 5) -> str:
     return ' '.join(s[1] for s in top)
 
 
-def extract_keywords(text: str, top_n: int = 10) -> list[str]:
+@perf.timed("summarize.batch")
+def generate_summaries_batch(docs: list, num_sentences: int = 5, method: str = "frequency") -> list[str]:
+    """Summaries for many chapters, scoring every sentence of every chapter in one pass.
+
+    "frequency" sums each chapter's normalized term frequencies per sentence
+    with a single weighted bincount over all term occurrences (the same
+    ranking as generate_summary, up to floating-point ties). "textrank"
+    builds one sparse sentence-term matrix and ranks sentences by centrality
+    in each chapter's similarity graph instead. The app and batch mode use
+    "frequency"; "textrank" is available to code calling this directly.
+    Falls back to generate_summary per document without scikit-learn.
+    Raises ValueError for any other method.
+    """
+    if method not in SUMMARY_METHODS:
+        raise ValueError(f"Unknown summary method {method!r}; expected one of {', '.join(SUMMARY_METHODS)}")
+    analyses = [analyze(d) for d in docs]
+    if not _load_sklearn():
+        return [generate_summary(a, num_sentences) for a in analyses]
+
+    textrank = method == "textrank"
+    summaries: list[str | None] = [None] * len(analyses)
+    vocab: dict[str, int] = {}
+    row_parts, value_parts = [], []  # Per term occurrence: sentence row, and column or weight
+    sentences, position_parts, blocks = [], [], []  # blocks: (doc index, first row, end row)
+    for d, a in enumerate(analyses):
+        if not a.text or len(a.text.strip()) < 50:
+            summaries[d] = "No content available."
+            continue
+        spans, doc_sentences = _summary_candidates(a)
+        if len(doc_sentences) <= num_sentences:
+            summaries[d] = ' '.join(doc_sentences)
+            continue
+
+        # Map every term occurrence to its sentence row with one searchsorted
+        offsets = np.asarray(a.term_offsets, dtype=np.int64)
+        starts = np.array([sp[0] for sp in spans], dtype=np.int64)
+        ends = np.array([sp[1] for sp in spans], dtype=np.int64)
+        sent = np.searchsorted(starts, offsets, side="right") - 1
+        inside = (sent >= 0) & (offsets < ends[np.maximum(sent, 0)])
+
+        # Dict lookups run through map() in C; stopwords are absent from term_counts
+        if textrank:
+            for w in a.term_counts:
+                vocab.setdefault(w, len(vocab))
+            values = np.fromiter(map(vocab.get, a.terms, repeat(-1)), dtype=np.int64, count=len(a.terms))
+            inside &= values >= 0
+        else:
+            freq = a.term_counts
+            max_freq = max(freq.values()) if freq else 1
+            values = np.fromiter(map(freq.get, a.terms, repeat(0)), dtype=np.float64, count=len(a.terms))
+            values /= max_freq
+
+        first = len(sentences)
+        row_parts.append(first + sent[inside])
+        value_parts.append(values[inside])
+        sentences.extend(doc_sentences)
+        position_parts.append(np.arange(len(doc_sentences)))
+        blocks.append((d, first, len(sentences)))
+
+    if not blocks:
+        return summaries
+
+    rows, values = np.concatenate(row_parts), np.concatenate(value_parts)
+    positions = np.concatenate(position_parts)
+    if textrank:
+        # Sentence-term count matrix; duplicate (row, col) entries are summed
+        counts = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, values)), shape=(len(sentences), max(len(vocab), 1)),
+        )
+        scores = np.zeros(len(sentences))
+        for _, lo, hi in blocks:
+            scores[lo:hi] = _textrank(counts[lo:hi])
+    else:
+        # Sum of normalized term frequencies per sentence, for every chapter at once
+        scores = np.bincount(rows, weights=values, minlength=len(sentences))
+        scores[positions < EARLY_SENTENCES] *= EARLY_BOOST  # Boost early sentences
+
+    for d, lo, hi in blocks:
+        order = np.lexsort((positions[lo:hi], -scores[lo:hi]))  # Best first; ties keep document order
+        top = sorted(order[:num_sentences])  # Restore order
+        summaries[d] = ' '.join(sentences[lo + i] for i in top)
+    return summaries
+
+
+def _textrank(counts) -> "np.ndarray":
+    """PageRank over cosine sentence similarity, without materializing the n x n graph."""
+    n = counts.shape[0]
+    norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+    unit = sparse.diags(np.divide(1.0, norms, out=np.zeros(n), where=norms > 0)) @ counts
+    self_sim = (norms > 0).astype(float)  # Each sentence's similarity to itself, excluded
+    degree = unit @ (unit.T @ np.ones(n)) - self_sim
+    degree[degree <= 0] = 1.0
+    rank = np.full(n, 1.0 / n)
+    for _ in range(TEXTRANK_ITERATIONS):
+        x = rank / degree
+        rank = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * (unit @ (unit.T @ x) - self_sim * x)
+    return rank
+
+
+def extract_keywords(text: str | TextAnalysis, top_n: int = 10) -> list[str]:
     """Fast keyword extraction using frequency analysis."""
     if not text:
         return []
-    words = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
-    filtered = [w for w in words if w not in STOPWORDS]
-    return [w for w, _ in Counter(filtered).most_common(top_n)]
+    return [w for w, _ in analyze(text).term_counts.most_common(top_n)]
+
+
+@perf.timed("keywords")
+def extract_keywords_batch(docs: list, top_n: int = 10, background: list | None = None) -> list[list[str]]:
+    """Distinctive keywords for each document via TF-IDF over the whole batch.
+
+    `docs` may be texts, TextAnalysis objects or term-count Counters (e.g.
+    memoized per chapter), so nothing is re-tokenized. Terms common to every
+    chapter are down-weighted instead of topping every list. Extra
+    `background` documents (e.g. pages) only sharpen the IDF. Falls back to
+    per-document frequency ranking without scikit-learn.
+    """
+    counts = [d if isinstance(d, Counter) else analyze(d).term_counts for d in docs]
+    if not _load_sklearn() or not any(counts):
+        return [[w for w, _ in c.most_common(top_n)] for c in counts]
+
+    extra = [d if isinstance(d, Counter) else analyze(d).term_counts for d in background or []]
+    vectorizer = DictVectorizer()
+    matrix = vectorizer.fit_transform(counts + extra)  # One sparse document-term matrix
+    weights = TfidfTransformer(sublinear_tf=True).fit(matrix).transform(matrix[:len(counts)]).tocsr()
+    terms = vectorizer.get_feature_names_out()
 
+    keywords = []
+    for i in range(len(counts)):
+        lo, hi = weights.indptr[i], weights.indptr[i + 1]
+        cols, vals = weights.indices[lo:hi], weights.data[lo:hi]
+        if len(vals) > top_n:
+            top = np.argpartition(-vals, top_n - 1)[:top_n]
+            cols, vals = cols[top], vals[top]
+        ranked = sorted(zip(-vals, terms[cols]))
+        keywords.append([str(term) for _, term in ranked])
+    return keywords
 
-def estimate_reading_time(text: str) -> str:
+
+def estimate_reading_time(text: str | TextAnalysis) -> str:
     """Estimate reading time at 250 wpm."""
-    minutes = math.ceil(len(text.split()) / 250)
+    if isinstance(text, TextAnalysis):
+        return format_reading_time(text.word_count)
+    return format_reading_time(len(text.split()))
+
+
+def format_reading_time(word_count: int) -> str:
+    """Format reading time for a word count at 250 wpm."""
+    minutes = math.ceil(word_count / 250)
     if minutes < 1:
         return "< 1 min"
     if minutes < 60:
@@ -73,19 +312,17 @@ def estimate_reading_time(text: str) -> str:
     return f"{minutes // 60}h {minutes % 60}m"
 
 
-def compute_reading_stats(text: str) -> dict:
+def compute_reading_stats(text: str | TextAnalysis) -> dict:
     """Compute reading statistics."""
-    words = text.split()
-    word_count = len(words)
+    a = analyze(text)
+    return _reading_stats(a.word_count, a.stat_sentence_count, a.syllables)
+
 
-    sentences = [s.strip() for s in re.split(r'[.!?]+', text) if len(s.strip()) > 3]
-    sentence_count = max(len(sentences), 1)
+def _reading_stats(word_count: int, sentence_count: int, syllables: int) -> dict:
+    sentence_count = max(sentence_count, 1)
     avg_sentence_len = round(word_count / sentence_count, 1)
 
     # Flesch-Kincaid approximation
-    all_words = re.findall(r'\b[a-zA-Z]+\b', text)
-    syllables = sum(max(len(re.findall(r'[aeiouy]+', w.lower())), 1) for w in all_words)
-
     if word_count > 0:
         fk = 206.835 - 1.015 * (word_count / sentence_count) - 84.6 * (syllables / max(word_count, 1))
         fk = max(0, min(100, round(fk, 1)))
@@ -109,3 +346,79 @@ def compute_reading_stats(text: str) -> dict:
         "reading_level": level,
         "reading_level_emoji": emoji,
     }
+
+
+@perf.timed("estimate_stats")
+def estimate_reading_stats(sample_texts: list[str], total_pages: int) -> dict:
+    """Approximate document stats from a sample of pages, scaled to the full page count."""
+    stats = compute_reading_stats("\n".join(sample_texts))
+    scale = total_pages / max(len(sample_texts), 1)
+    stats["word_count"] = round(stats["word_count"] * scale)
+    stats["sentence_count"] = max(round(stats["sentence_count"] * scale), 1)
+    return stats
+
+
+class PageStats:
+    """Per-page word, sentence and syllable counts with prefix sums.
+
+    Built once per document; stats for any 1-based `start_page..end_page`
+    range are then constant-time lookups instead of a re-scan of the text.
+    """
+
+    def __init__(self, analyses):
+        words, sentences, syllables = [], [], []
+        for a in analyses:
+            words.append(a.word_count)
+            sentences.append(a.stat_sentence_count)
+            syllables.append(a.syllables)
+        self.num_pages = len(words)
+        self._words = array('q', accumulate(words, initial=0))
+        self._sentences = array('q', accumulate(sentences, initial=0))
+        self._syllables = array('q', accumulate(syllables, initial=0))
+
+    @classmethod
+    @perf.timed("page_stats")
+    def from_texts(cls, page_texts) -> "PageStats":
+        return cls(analyze(t) for t in page_texts)
+
+    def _span(self, start_page: int, end_page: int) -> tuple[int, int]:
+        lo = min(max(start_page - 1, 0), self.num_pages)
+        return lo, min(max(end_page, lo), self.num_pages)
+
+    def word_count(self, start_page: int, end_page: int) -> int:
+        lo, hi = self._span(start_page, end_page)
+        return self._words[hi] - self._words[lo]
+
+    def range_stats(self, start_page: int, end_page: int, skip_pages=()) -> dict:
+        """Same shape as compute_reading_stats, for a page range less any 1-based `skip_pages`."""
+        spans = [self._span(page, page) for page in skip_pages]
+        lo, hi = self._span(start_page, end_page)
+        return _reading_stats(*(
+            prefix[hi] - prefix[lo] - sum(prefix[b] - prefix[a] for a, b in spans)
+            for prefix in (self._words, self._sentences, self._syllables)
+        ))
+
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self._words, self._sentences, self._syllables))
+
+
+class StatsAccumulator:
+    """Folds texts (e.g. pages from a stream) into running document totals."""
+
+    def __init__(self):
+        self.word_count = 0
+        self.sentence_count = 0
+        self.syllables = 0
+        self.term_counts = Counter()
+
+    def add(self, text: str | TextAnalysis) -> TextAnalysis:
+        a = analyze(text)
+        self.word_count += a.word_count
+        self.sentence_count += a.stat_sentence_count
+        self.syllables += a.syllables
+        self.term_counts.update(a.term_counts)
+        return a
+
+    def stats(self) -> dict:
+        """Same shape as compute_reading_stats, for everything added so far."""
+        return _reading_stats(self.word_count, self.sentence_count, self.syllables)
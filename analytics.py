@@ -2,19 +2,32 @@
 Analytics Module — Plotly charts for reading analytics.
 """
 
-import re
 from collections import Counter
 
-try:
-    import plotly.graph_objects as go
-    HAS_PLOTLY = True
-except ImportError:
-    HAS_PLOTLY = False
+import perf
+from ai_engine import TextAnalysis, analyze
 
+# Plotly is slow to import and only needed once results are shown
+go = None
+HAS_PLOTLY: bool | None = None  # Unknown until _load_plotly() runs
 
+
+def _load_plotly() -> bool:
+    """Import plotly once; False if it is not installed."""
+    global go, HAS_PLOTLY
+    if HAS_PLOTLY is None:
+        try:
+            import plotly.graph_objects as go
+            HAS_PLOTLY = True
+        except ImportError:
+            HAS_PLOTLY = False
+    return HAS_PLOTLY
+
+
+@perf.timed("chart.distribution")
 def chapter_distribution_chart(chapters_data: list[dict]):
     """Bar chart of word count per chapter."""
-    if not HAS_PLOTLY or not chapters_data:
+    if not chapters_data or not _load_plotly():
         return None
 
     names = [d["name"][:20] for d in chapters_data]
@@ -35,23 +48,14 @@ def chapter_distribution_chart(chapters_data: list[dict]):
     return fig
 
 
-def frequent_terms_chart(text: str, top_n: int = 15):
-    """Horizontal bar chart of most frequent terms."""
-    if not HAS_PLOTLY:
+@perf.timed("chart.terms")
+def frequent_terms_chart(text: str | TextAnalysis | Counter, top_n: int = 15):
+    """Horizontal bar chart of most frequent terms (from text or precomputed term counts)."""
+    if not _load_plotly():
         return None
 
-    stopwords = {
-        'the', 'and', 'for', 'that', 'this', 'with', 'from', 'have', 'has',
-        'had', 'are', 'were', 'was', 'been', 'will', 'would', 'could',
-        'not', 'but', 'also', 'than', 'then', 'when', 'where', 'which',
-        'what', 'who', 'how', 'they', 'their', 'them', 'these', 'those',
-        'your', 'into', 'more', 'some', 'been', 'other', 'such', 'only',
-        'very', 'just', 'about', 'does', 'through', 'chapter', 'page',
-    }
-
-    words = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
-    filtered = [w for w in words if w not in stopwords]
-    top = Counter(filtered).most_common(top_n)
+    term_counts = text if isinstance(text, Counter) else analyze(text).term_counts
+    top = term_counts.most_common(top_n)
 
     if not top:
         return None
@@ -4,14 +4,18 @@ AI-Powered Document Analysis & Chapter Splitting
 """
 
 import streamlit as st
-from pypdf import PdfReader
-import io
-import zipfile
-
-from pdf_processor import extract_page_texts, extract_full_text, split_pdf_to_buffers, get_chapter_texts
-from ai_engine import generate_summary, extract_keywords, estimate_reading_time, compute_reading_stats
-from analytics import chapter_distribution_chart, frequent_terms_chart
-from ui_components import inject_custom_css, render_hero, render_metric, render_chapter_card, render_section, render_divider
+import time
+import uuid
+from bisect import bisect_left
+from collections import Counter
+from typing import TYPE_CHECKING
+
+# Only light modules load up front; pypdf, pandas and the analysis stack
+# are imported once a document is uploaded (see "Read PDF" below)
+import perf
+from jobs import CANCELLED, DONE, QUEUED, JobManager
+from output_store import OutputExpired, OutputStore, TempDirOutputStore, build_zip
+from ui_components import inject_custom_css, render_hero, render_metric, render_chapter_card, render_section, render_divider, render_perf_trace
 
 # ── Config ─────────────────────────────────────────────────────
 st.set_page_config(page_title="PDF Intelligence Platform", page_icon="📘", layout="wide")
@@ -19,16 +23,82 @@ inject_custom_css()
 
 # ── Session State ──────────────────────────────────────────────
 STATE_DEFAULTS = {
-    "page_texts": [],
-    "full_text": "",
+    "doc_id": None,
+    "upload_digest": None,
+    "term_counts": Counter(),
     "total_pages": 0,
     "ai_results": [],
     "generated_pdfs": [],
+    "split_memo": {},
+    "chapter_rows": [],
+    "chapter_basis": None,
+    "chapter_base": None,
+    "chapter_rev": 0,
+    "detected_applied": None,
+    "run_summary": "",
+    "zip_handle": None,
+    "zip_level": None,
+    "job_id": None,
+    "job_trace": None,
     "done": False,
 }
 for k, v in STATE_DEFAULTS.items():
     if k not in st.session_state:
         st.session_state[k] = v
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Stage timings are only collected while the performance panel is on
+run_trace = perf.Trace("Script run") if st.session_state.get("perf_enabled") else None
+perf.activate(run_trace)
+
+
+if TYPE_CHECKING:
+    from doc_cache import DocumentCache
+
+
+@st.cache_resource
+def get_document_cache() -> "DocumentCache":
+    """One document cache shared by every session on this server."""
+    from doc_cache import DocumentCache
+    return DocumentCache(jobs=get_job_manager())
+
+
+@st.cache_resource
+def get_output_store() -> OutputStore:
+    """Generated chapters spool to disk under one global budget."""
+    return TempDirOutputStore()
+
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    """Background jobs for all sessions, capped at MAX_CONCURRENT_JOBS at a time."""
+    return JobManager()
+
+
+def page_ranges_label(pages: list[int], max_ranges: int = 12) -> str:
+    """Compact 1-based label for sorted 0-based page indices, e.g. "3–7, 12"."""
+    ranges = []
+    for p in pages:
+        if ranges and ranges[-1][1] == p:
+            ranges[-1][1] = p + 1
+        else:
+            ranges.append([p + 1, p + 1])
+    label = ", ".join(f"{a}–{b}" if a != b else str(a) for a, b in ranges[:max_ranges])
+    return label + (", …" if len(ranges) > max_ranges else "")
+
+
+def read_output(handle) -> bytes | None:
+    """Bytes of a stored output, or None (with a warning) if it was evicted meanwhile."""
+    try:
+        return output_store.read(handle)
+    except OutputExpired:
+        st.warning("⌛ This download expired to free server space — please split again.")
+        return None
+
+
+output_store = get_output_store()
+job_manager = get_job_manager()
 
 
 # ── Sidebar ────────────────────────────────────────────────────
@@ -38,8 +108,8 @@ with st.sidebar:
     st.markdown("""
     **How to use:**
     1. Upload a PDF
-    2. Choose number of chapters
-    3. Set page ranges for each
+    2. Review the detected chapters
+    3. Adjust page ranges as needed
     4. Click Split & Analyze
     5. Download your PDFs!
     """)
@@ -53,6 +123,9 @@ with st.sidebar:
     - 📥 Individual & ZIP Download
     """)
     st.markdown("---")
+    st.toggle("⏱️ Performance panel", key="perf_enabled", help="Record stage timings for this session")
+    perf_panel = st.container()
+    st.markdown("---")
     st.caption("Built by [Shah Bakhsh](https://github.com/shah-bakhsh)")
 
 # ── Hero ───────────────────────────────────────────────────────
@@ -77,10 +150,21 @@ if not uploaded_file:
     st.stop()
 
 # ── Read PDF ───────────────────────────────────────────────────
-uploaded_file.seek(0)
+import pandas as pd
+from pdf_processor import even_chapters, size_bounded_chapters, skip_pages
+from pipeline import split_and_analyze
+from ai_engine import format_reading_time
+from analytics import chapter_distribution_chart, frequent_terms_chart
+
+doc_cache = get_document_cache()
 try:
-    reader = PdfReader(uploaded_file)
-    total_pages = len(reader.pages)
+    # Hash each upload once per session; reruns look the document up by its digest
+    if st.session_state.upload_digest is None or st.session_state.upload_digest[0] != uploaded_file.file_id:
+        from doc_cache import document_id
+        with perf.stage("hash"):
+            st.session_state.upload_digest = (uploaded_file.file_id, document_id(uploaded_file))
+    doc = doc_cache.get_or_load(uploaded_file, doc_id=st.session_state.upload_digest[1])
+    total_pages = doc.total_pages
 except Exception as e:
     st.error(f"❌ Failed to read PDF: {e}")
     st.stop()
@@ -89,90 +173,253 @@ if total_pages == 0:
     st.error("This PDF has no pages!")
     st.stop()
 
-# Extract text (only once)
-if not st.session_state.page_texts or st.session_state.total_pages != total_pages:
-    with st.spinner("📖 Reading document..."):
-        st.session_state.page_texts = extract_page_texts(reader)
-        st.session_state.full_text = extract_full_text(st.session_state.page_texts)
-        st.session_state.total_pages = total_pages
-        # Reset results when new file uploaded
-        st.session_state.ai_results = []
-        st.session_state.generated_pdfs = []
-        st.session_state.done = False
+# Sessions keep only the doc_id; the parsed document lives in the shared cache,
+# so evicting it there actually frees the reader and its page texts
+if st.session_state.doc_id != doc.doc_id:
+    st.session_state.doc_id = doc.doc_id
+    st.session_state.term_counts = Counter()
+    st.session_state.total_pages = total_pages
+    # Reset results when new file uploaded
+    st.session_state.ai_results = []
+    st.session_state.generated_pdfs = []
+    st.session_state.split_memo = {}
+    st.session_state.chapter_base = None
+    st.session_state.detected_applied = None
+    st.session_state.pop("start_mode", None)  # The next document picks its own default
+    st.session_state.zip_handle = None
+    st.session_state.done = False
+    job_manager.cancel_session(st.session_state.session_id)
+    st.session_state.job_id = None
+    output_store.release_session(st.session_state.session_id)
 
 # ── Document Overview ──────────────────────────────────────────
 render_divider()
 render_section("📊 Document Overview")
 
-stats = compute_reading_stats(st.session_state.full_text)
+with perf.stage("overview"):
+    stats, stats_exact = doc_cache.overview_stats(doc)
+approx = "" if stats_exact else "~"
 
 c1, c2, c3, c4, c5 = st.columns(5)
 with c1: render_metric("📄", str(total_pages), "Pages")
-with c2: render_metric("📝", f"{stats['word_count']:,}", "Words")
+with c2: render_metric("📝", f"{approx}{stats['word_count']:,}", "Words")
 with c3: render_metric("📏", str(stats['avg_sentence_length']), "Avg Sentence")
 with c4: render_metric(stats['reading_level_emoji'], f"{stats['reading_difficulty']}", stats['reading_level'])
-with c5: render_metric("⏱️", estimate_reading_time(st.session_state.full_text), "Read Time")
+with c5: render_metric("⏱️", approx + format_reading_time(stats['word_count']), "Read Time")
+if not stats_exact:
+    st.caption("~ Estimated from a sample of pages; exact figures appear once the full text has been read.")
+
+# Scanned pages have no text layer, so they are skipped by extraction and by the analysis
+with perf.stage("overview.image_only", pages=total_pages):
+    image_only = doc_cache.image_only_pages(doc)
+if image_only:
+    st.warning(
+        f"🖼️ {len(image_only)} of {total_pages} pages are image-only (no text layer), so stats and AI "
+        f"results cover only the remaining pages. Image-only: {page_ranges_label(image_only)}"
+    )
 
 # ── Chapter Setup (USER CONTROLS) ─────────────────────────────
 render_divider()
 render_section("✂️ Define Your Chapters")
 
-st.markdown("**You decide how to split your document.** Set the number of chapters and page ranges below.")
+st.markdown("**You decide how to split your document.** Start from the detected chapters or an even split, then edit, add or remove rows.")
+
+START_MODES = {"detected": "📑 Detected chapters", "even": "➗ Even split", "size": "📦 Max size per part"}
+
+
+def use_detected_chapters():
+    """Load the detected chapters into the table; only ever on the user's request."""
+    found = doc_cache.detect_chapters(doc)
+    st.session_state.detected_applied = found[0] if found else []
+    st.session_state.chapter_base = None
+    st.session_state.chapter_rev += 1
 
-num_chapters = st.number_input(
-    "How many chapters?",
-    min_value=1, max_value=50, value=1, step=1
-)
 
-# Calculate even page splits as defaults
-pages_per_chapter = max(1, total_pages // num_chapters)
+def on_start_mode_change():
+    if st.session_state.start_mode == "detected":
+        use_detected_chapters()
+
+
+# Bookmarks are read for free; the heading heuristic needs every page's text, which a
+# background job may finish later — so detection never replaces the table by itself
+detected = doc_cache.detect_chapters(doc)
+detected_chapters = detected[0] if detected else []
+if "start_mode" not in st.session_state:
+    st.session_state.start_mode = "detected" if detected_chapters else "even"
+    st.session_state.detected_applied = detected_chapters
+if detected is None:
+    st.caption("No bookmarks found. Chapter headings can be detected from the page text.")
+    if st.button("🔍 Detect Chapter Headings"):
+        with st.spinner("🔍 Reading pages for chapter headings..."):
+            doc_cache.detect_chapters(doc, read_text=True)
+        st.session_state.start_mode = "detected"
+        use_detected_chapters()
+        st.rerun()
+elif not detected_chapters:
+    st.caption("No bookmarks or chapter headings found.")
+else:
+    source = "bookmarks" if detected[1] == "outline" else "page headings"
+    st.caption(f"📑 {len(detected_chapters)} chapters detected from {source}.")
+
+# Fixed options and a key: the choice survives reruns whatever detection finds meanwhile
+start_mode = st.radio("Start from", list(START_MODES), format_func=START_MODES.get, horizontal=True,
+                      key="start_mode", on_change=on_start_mode_change)
+
+if start_mode == "detected":
+    applied = st.session_state.detected_applied or []
+    if detected_chapters and applied != detected_chapters:
+        st.button(f"📑 Use the {len(detected_chapters)} detected chapters (replaces the table)",
+                  on_click=use_detected_chapters)
+    if applied:
+        defaults = applied
+    else:
+        st.caption("Nothing detected to start from — the table holds the whole document as one chapter.")
+        defaults = even_chapters(total_pages, 1)
+    basis = (doc.doc_id, "detected")
+elif start_mode == "size":
+    max_part_mb = st.number_input(
+        "Maximum size per part (MB)",
+        min_value=0.1, value=10.0, step=1.0,
+        help="Estimated from each page's content, fonts and images before splitting; "
+             "shared resources are counted once per part.",
+    )
+    with st.spinner("📦 Measuring pages..."):
+        size_model = doc_cache.size_model(doc)
+    defaults = size_bounded_chapters(size_model, int(max_part_mb * 1024 * 1024))
+    basis = (doc.doc_id, f"size_{max_part_mb}")
+    st.caption(f"📦 {len(defaults)} part(s) estimated at or under {max_part_mb:g} MB each")
+else:
+    num_chapters = st.number_input(
+        "How many chapters?",
+        min_value=1, max_value=total_pages, value=1, step=1
+    )
+    # Calculate even page splits as defaults
+    defaults, basis = even_chapters(total_pages, num_chapters), (doc.doc_id, f"even_{num_chapters}")
+
+
+def add_chapter_from_hit(name: str, start: int, end: int):
+    """Append a search hit's page run as a chapter, keeping the table's current edits."""
+    rows = st.session_state.chapter_rows + [{"name": name, "start_page": start, "end_page": end}]
+    st.session_state.chapter_base = (st.session_state.chapter_basis, rows)
+    st.session_state.chapter_rev += 1  # Rows can only be added by starting a fresh table
+
+
+with st.expander("🔎 Find Pages"):
+    search_index = doc.search_index
+    if search_index is None:
+        st.caption("Search needs the text of every page.")
+        if st.button("📖 Build Search Index"):
+            with st.spinner("📖 Reading every page..."):
+                doc_cache.ensure_texts(doc)
+            st.rerun()
+    else:
+        query = st.text_input("Search this document", placeholder="e.g. neural networks", key="search_query")
+        if query.strip():
+            search_start = time.perf_counter()
+            hits = search_index.search(query)
+            st.caption(f"{len(hits)} best matching page(s) in {(time.perf_counter() - search_start) * 1000:.1f} ms")
+            for i, hit in enumerate(hits):
+                c_hit, c_add = st.columns([5, 1])
+                with c_hit:
+                    st.markdown(f"**Page {hit['page']}** — {hit['snippet']}")
+                with c_add:
+                    st.button(
+                        f"➕ Pages {hit['start_page']}–{hit['end_page']}", key=f"hit_{i}",
+                        help="Add the run of matching pages around this hit as a chapter",
+                        on_click=add_chapter_from_hit,
+                        args=(query.strip().title(), hit["start_page"], hit["end_page"]),
+                    )
+
+# Rows added from search hits extend the current table
+if st.session_state.chapter_base is not None and st.session_state.chapter_base[0] == basis:
+    defaults = st.session_state.chapter_base[1]
+
+# One table widget instead of a row of inputs per chapter, so hundreds of sections stay responsive
+edited = st.data_editor(
+    pd.DataFrame(defaults, columns=["name", "start_page", "end_page"]),
+    key=f"chapters_{basis[0]}_{basis[1]}_{st.session_state.chapter_rev}",  # A new basis starts a fresh table
+    num_rows="dynamic",
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "name": st.column_config.TextColumn("Chapter Name"),
+        "start_page": st.column_config.NumberColumn("Start", min_value=1, max_value=total_pages, step=1, required=True),
+        "end_page": st.column_config.NumberColumn("End", min_value=1, max_value=total_pages, step=1, required=True),
+    },
+)
 
 chapters_input = []
-for i in range(num_chapters):
-    default_start = i * pages_per_chapter + 1
-    default_end = min((i + 1) * pages_per_chapter, total_pages)
-    if i == num_chapters - 1:
-        default_end = total_pages  # Last chapter gets remaining pages
-
-    col1, col2, col3 = st.columns([3, 1, 1])
-    with col1:
-        name = st.text_input(
-            f"Chapter {i+1} Name",
-            f"Chapter {i+1}",
-            key=f"name_{i}",
-            label_visibility="collapsed" if i > 0 else "visible",
-        )
-    with col2:
-        start = st.number_input(
-            f"Start",
-            min_value=1, max_value=total_pages,
-            value=min(default_start, total_pages),
-            key=f"start_{i}",
-            label_visibility="collapsed" if i > 0 else "visible",
-        )
-    with col3:
-        end = st.number_input(
-            f"End",
-            min_value=1, max_value=total_pages,
-            value=default_end,
-            key=f"end_{i}",
-            label_visibility="collapsed" if i > 0 else "visible",
+for i, row in enumerate(edited.to_dict("records")):
+    if pd.isna(row["start_page"]) or pd.isna(row["end_page"]):
+        continue  # Row still being filled in
+    name = row["name"] if isinstance(row["name"], str) and row["name"].strip() else f"Chapter {i+1}"
+    chapters_input.append({"name": name, "start_page": int(row["start_page"]), "end_page": int(row["end_page"])})
+st.session_state.chapter_rows = chapters_input
+st.session_state.chapter_basis = basis
+
+# Repeated covers, disclaimers and appendices are found by MinHash/LSH over the page texts
+exclude_duplicates = st.checkbox(
+    "🔁 Leave out near-duplicate pages (repeated covers, disclaimers, appendices)",
+    value=False,
+    help="Later copies of a page whose text is at least 80% the same as an earlier page are skipped "
+         "in the split files and the AI analysis. Image-only pages are never matched.",
+)
+if exclude_duplicates:
+    with st.spinner("🔁 Comparing pages..."):
+        duplicates = doc_cache.near_duplicates(doc)
+    if duplicates:
+        st.caption(
+            f"🔁 {len(duplicates)} near-duplicate page(s) of {len(set(duplicates.values()))} original(s) "
+            f"will be left out: {page_ranges_label(sorted(duplicates))}"
         )
-
-    chapters_input.append({"name": name, "start_page": start, "end_page": end})
+        chapters_input = skip_pages(chapters_input, duplicates)
+    else:
+        st.caption("🔁 No near-duplicate pages found.")
+
+# Per-page prefix sums (once the full text is read) give live stats for any range
+page_stats = doc.page_stats
+if page_stats is not None and chapters_input:
+    with st.expander("📈 Live Stats", expanded=len(chapters_input) <= 20):
+        live = []
+        for ch in chapters_input:
+            if ch["start_page"] > ch["end_page"]:
+                continue
+            ch_stats = page_stats.range_stats(ch["start_page"], ch["end_page"], ch.get("skip_pages", ()))
+            words = ch_stats["word_count"]
+            row = {
+                "Chapter": ch["name"],
+                "Pages": f"{ch['start_page']}–{ch['end_page']}",
+                "Words": words,
+                "Read Time": format_reading_time(words),
+                "Difficulty": f"{ch_stats['reading_level_emoji']} {ch_stats['reading_difficulty']}",
+            }
+            if image_only:
+                row["🖼️ Image-only"] = bisect_left(image_only, ch["end_page"]) - bisect_left(image_only, ch["start_page"] - 1)
+            if exclude_duplicates:
+                row["🔁 Left out"] = len(ch.get("skip_pages", ()))
+            live.append(row)
+        st.dataframe(live, hide_index=True, use_container_width=True)
 
 # ── Action Button ──────────────────────────────────────────────
 render_divider()
 
+compress_output = st.checkbox(
+    "🗜️ Compress page content streams (smaller files, slower split)",
+    value=False,
+)
+
+active_job = job_manager.get(st.session_state.job_id)
+busy = active_job is not None and not active_job.finished
+
 col_btn1, col_btn2 = st.columns(2)
 with col_btn1:
-    split_only = st.button("✂️ Split PDF Only", use_container_width=True)
+    split_only = st.button("✂️ Split PDF Only", use_container_width=True, disabled=busy)
 with col_btn2:
-    split_ai = st.button("🚀 Split + AI Analysis", type="primary", use_container_width=True)
+    split_ai = st.button("🚀 Split + AI Analysis", type="primary", use_container_width=True, disabled=busy)
 
 if split_only or split_ai:
     # Validate
-    errors = []
+    errors = [] if chapters_input else ["Add at least one chapter."]
     for ch in chapters_input:
         if ch["start_page"] > ch["end_page"]:
             errors.append(f"'{ch['name']}': Start ({ch['start_page']}) > End ({ch['end_page']})")
@@ -180,34 +427,48 @@ if split_only or split_ai:
         for e in errors:
             st.error(e)
     else:
-        with st.spinner("✂️ Splitting PDF..."):
-            generated = split_pdf_to_buffers(uploaded_file, chapters_input)
-            st.session_state.generated_pdfs = generated
-
-        if split_ai:
-            progress = st.progress(0, "🧠 Running AI analysis...")
-            chapter_texts = get_chapter_texts(st.session_state.page_texts, chapters_input)
-
-            ai_results = []
-            for i, (ch, ch_text) in enumerate(zip(chapters_input, chapter_texts)):
-                progress.progress((i + 1) / len(chapters_input), f"Analyzing {ch['name']}...")
-
-                word_count = len(ch_text.split())
-                ai_results.append({
-                    "name": ch["name"],
-                    "start_page": ch["start_page"],
-                    "end_page": ch["end_page"],
-                    "summary": generate_summary(ch_text),
-                    "keywords": extract_keywords(ch_text),
-                    "reading_time": estimate_reading_time(ch_text),
-                    "word_count": word_count,
-                })
-
-            st.session_state.ai_results = ai_results
-            progress.progress(1.0, "✅ Done!")
+        # Runs outside the script, so widget interactions don't restart it
+        job = job_manager.submit(
+            st.session_state.session_id, "Split + AI Analysis" if split_ai else "Split PDF",
+            split_and_analyze, doc, doc_cache, output_store, st.session_state.session_id,
+            st.session_state.split_memo, chapters_input, compress_output, split_ai,
+            trace=bool(st.session_state.get("perf_enabled")),
+        )
+        st.session_state.job_id = job.id
+        st.rerun()
 
-        st.session_state.done = True
+
+@st.fragment(run_every=1.0)
+def render_job_progress(job_id: str):
+    """Poll a running job; a full rerun picks up its results when it finishes."""
+    job = job_manager.get(job_id)
+    if job is None or job.finished:
         st.rerun()
+    if job.status == QUEUED:
+        st.progress(0.0, f"⏳ Waiting for a free worker (position {job_manager.queue_position(job)})...")
+    else:
+        st.progress(job.progress, job.message)
+    if st.button("✖️ Cancel", key="cancel_job", disabled=job.cancel_requested):
+        job_manager.cancel(job_id)
+
+
+if busy:
+    render_job_progress(active_job.id)
+elif active_job is not None:
+    job = job_manager.collect(active_job.id)
+    st.session_state.job_id = None
+    if job.status == DONE:
+        st.session_state.generated_pdfs = job.result["generated_pdfs"]
+        st.session_state.ai_results = job.result.get("ai_results", [])
+        st.session_state.term_counts = job.result.get("term_counts", Counter())
+        st.session_state.run_summary = job.result["run_summary"]
+        st.session_state.job_trace = job.result.get("trace")
+        st.session_state.zip_handle = None
+        st.session_state.done = True
+    elif job.status == CANCELLED:
+        st.info("✖️ Cancelled.")
+    else:
+        st.error(f"❌ {job.label} failed: {job.error}")
 
 
 # ── Results Section ────────────────────────────────────────────
@@ -231,71 +492,137 @@ if st.session_state.done:
         render_divider()
         render_section("📊 Analytics Dashboard")
 
+        # Figures depend only on the document and the chapter ranges, so reruns reuse them
         chart_data = [{"name": r["name"], "word_count": r["word_count"]} for r in st.session_state.ai_results]
+        layout_key = tuple(
+            (r["name"], r["start_page"], r["end_page"], r.get("skipped_pages", 0)) for r in st.session_state.ai_results
+        )
 
         col_c1, col_c2 = st.columns(2)
         with col_c1:
-            fig1 = chapter_distribution_chart(chart_data)
+            fig1 = doc_cache.artifact(doc, ("distribution_chart", layout_key),
+                                      lambda: chapter_distribution_chart(chart_data))
             if fig1:
                 st.plotly_chart(fig1, use_container_width=True)
         with col_c2:
-            fig2 = frequent_terms_chart(st.session_state.full_text)
+            fig2 = doc_cache.artifact(doc, ("terms_chart", layout_key),
+                                      lambda: frequent_terms_chart(st.session_state.term_counts))
             if fig2:
                 st.plotly_chart(fig2, use_container_width=True)
 
+    if st.session_state.run_summary:
+        st.caption(st.session_state.run_summary)
+
     # Downloads
     render_divider()
     render_section("📥 Download Your Chapters")
 
-    if st.session_state.generated_pdfs:
-        st.success(f"✅ {len(st.session_state.generated_pdfs)} chapter(s) ready!")
-
-        for idx, pdf in enumerate(st.session_state.generated_pdfs):
-            c_info, c_btn = st.columns([4, 1])
-            with c_info:
-                kb = len(pdf["data"]) / 1024
-                st.markdown(f"**{pdf['name']}** — Pages {pdf['start_page']}–{pdf['end_page']} — `{kb:.0f} KB`")
-            with c_btn:
-                st.download_button("📥 Download", pdf["data"], pdf["file_name"], "application/pdf", key=f"dl_{idx}")
+    if any(pdf["handle"] not in output_store for pdf in st.session_state.generated_pdfs):
+        st.warning("⌛ These downloads expired to free server space — please split again.")
+        st.session_state.generated_pdfs = []
 
-        render_divider()
+    if st.session_state.generated_pdfs:
+        total_kb = sum(pdf["size"] for pdf in st.session_state.generated_pdfs) / 1024
+        total_secs = sum(pdf["seconds"] for pdf in st.session_state.generated_pdfs)
+        st.success(
+            f"✅ {len(st.session_state.generated_pdfs)} chapter(s) ready! "
+            f"`{total_kb:,.0f} KB` total, split in {total_secs:.1f}s"
+        )
 
-        # ZIP download
-        zip_buf = io.BytesIO()
-        with zipfile.ZipFile(zip_buf, "w", zipfile.ZIP_DEFLATED) as zf:
-            for pdf in st.session_state.generated_pdfs:
-                zf.writestr(pdf["file_name"], pdf["data"])
-        zip_buf.seek(0)
-
-        st.download_button(
-            "📦 Download All Chapters (ZIP)",
-            zip_buf, "chapters.zip", "application/zip",
-            key="dl_zip", use_container_width=True,
+        # One table plus a single download button: only the selected output's bytes are read
+        # and handed to Streamlit (which keeps them in memory), never every part at once
+        pdfs = st.session_state.generated_pdfs
+        any_skipped = any(pdf.get("skip_pages") for pdf in pdfs)
+        rows = []
+        for pdf in pdfs:
+            row = {
+                "Chapter": pdf["name"],
+                "Pages": f"{pdf['start_page']}–{pdf['end_page']}",
+                "Size": f"{pdf['size'] / 1024:,.0f} KB",
+                "Split": f"{pdf['seconds']:.2f}s",
+            }
+            if any_skipped:
+                row["🔁 Left out"] = len(pdf.get("skip_pages", ()))
+            rows.append(row)
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+
+        ZIP_CHOICE = -1
+        choice = st.selectbox(
+            "Download",
+            [*range(len(pdfs)), ZIP_CHOICE],
+            format_func=lambda i: "📦 All chapters (ZIP)" if i == ZIP_CHOICE else f"📄 {pdfs[i]['file_name']}",
         )
+        if choice == ZIP_CHOICE:
+            # Built once per result set, on request
+            light_deflate = st.checkbox("Deflate ZIP members (PDFs barely shrink; off is fastest)", value=False)
+            zip_level = 1 if light_deflate else None
+            zip_handle = st.session_state.zip_handle
+            if zip_handle is None or zip_handle not in output_store or st.session_state.zip_level != zip_level:
+                if st.button("📦 Prepare ZIP of All Chapters", key="mk_zip", use_container_width=True):
+                    with st.spinner("📦 Bundling chapters..."):
+                        try:
+                            st.session_state.zip_handle = build_zip(
+                                output_store, st.session_state.session_id, pdfs, zip_level,
+                            )
+                            st.session_state.zip_level = zip_level
+                        except OutputExpired:
+                            pass  # A part was evicted meanwhile; the rerun reports it
+                    st.rerun()
+            else:
+                data = read_output(zip_handle)
+                if data is not None:
+                    st.download_button(
+                        f"📦 Download All Chapters (ZIP, {zip_handle.size / 1024:,.0f} KB)",
+                        data, "chapters.zip", "application/zip",
+                        key="dl_zip", use_container_width=True,
+                    )
+        else:
+            pdf = pdfs[choice]
+            data = read_output(pdf["handle"])
+            if data is not None:
+                st.download_button(
+                    f"📥 Download {pdf['name']} ({pdf['size'] / 1024:,.0f} KB)",
+                    data, pdf["file_name"], "application/pdf",
+                    key="dl_chapter", use_container_width=True,
+                )
 
         # AI Report (if AI was run)
         if st.session_state.ai_results:
-            lines = ["# 📘 AI Analysis Report\n\n"]
-            lines.append(f"**Pages:** {total_pages} | **Words:** {stats['word_count']:,} | **Difficulty:** {stats['reading_level']}\n\n---\n\n")
-            for r in st.session_state.ai_results:
-                lines.append(f"## {r['name']} (Pages {r['start_page']}–{r['end_page']})\n")
-                lines.append(f"**Words:** {r['word_count']:,} | **Reading Time:** {r['reading_time']}\n\n")
-                lines.append(f"**Summary:** {r['summary']}\n\n")
-                lines.append(f"**Keywords:** {', '.join(r['keywords'])}\n\n---\n\n")
+            def build_report() -> str:
+                lines = ["# 📘 AI Analysis Report\n\n"]
+                lines.append(f"**Pages:** {total_pages} | **Words:** {stats['word_count']:,} | **Difficulty:** {stats['reading_level']}\n\n---\n\n")
+                for r in st.session_state.ai_results:
+                    lines.append(f"## {r['name']} (Pages {r['start_page']}–{r['end_page']})\n")
+                    lines.append(f"**Words:** {r['word_count']:,} | **Reading Time:** {r['reading_time']}\n\n")
+                    lines.append(f"**Summary:** {r['summary']}\n\n")
+                    lines.append(f"**Keywords:** {', '.join(r['keywords'])}\n\n---\n\n")
+                return '\n'.join(lines)
+
+            report_key = ("ai_report", layout_key, stats_exact)
 
             st.download_button(
                 "📄 Download AI Report",
-                '\n'.join(lines), "ai_report.md", "text/markdown",
+                doc_cache.artifact(doc, report_key, build_report), "ai_report.md", "text/markdown",
                 key="dl_report", use_container_width=True,
             )
 
     # Reset
     render_divider()
     if st.button("🔄 Analyze Another Document", use_container_width=True):
+        job_manager.cancel_session(st.session_state.session_id)
+        output_store.release_session(st.session_state.session_id)
         for k, v in STATE_DEFAULTS.items():
             st.session_state[k] = v
         st.rerun()
 
+# ── Performance Panel ──────────────────────────────────────────
+if run_trace is not None:
+    run_trace.finish()
+    with perf_panel:
+        render_perf_trace(run_trace, "run")
+        if st.session_state.job_trace is not None:
+            render_perf_trace(st.session_state.job_trace, "job")
+
 # ── Footer ─────────────────────────────────────────────────────
 render_divider()
 st.markdown("""
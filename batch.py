@@ -0,0 +1,157 @@
+"""
+Batch Module — Headless splitting and analysis for a directory of PDFs.
+
+    python batch.py INPUT_DIR OUTPUT_DIR --chapters 10
+    python batch.py INPUT_DIR OUTPUT_DIR --manifest chapters.json --workers 8
+    python batch.py INPUT_DIR OUTPUT_DIR --max-part-mb 25 --skip-duplicates
+
+Each document gets OUTPUT_DIR/<stem>/ with its chapter PDFs and a
+report.json. The report is written last, so documents that already have
+one are skipped on the next run (resume), and a failure in one file never
+stops the others.
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pdf_processor import (
+    DEFAULT_WORKERS, POOL_START_METHOD, MappedPdf, PageSizeModel, even_chapters, iter_page_texts,
+    size_bounded_chapters, skip_pages,
+)
+from streaming import stream_document
+
+REPORT_NAME = "report.json"
+
+
+def load_manifest(path: str) -> dict[str, list[dict]]:
+    """Read chapter specs keyed by PDF file name.
+
+    JSON: {"book.pdf": [{"name": ..., "start_page": ..., "end_page": ...}, ...]}
+    CSV:  columns file,name,start_page,end_page (one row per chapter)
+    """
+    if path.lower().endswith(".csv"):
+        manifest: dict[str, list[dict]] = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                manifest.setdefault(row["file"], []).append({
+                    "name": row["name"],
+                    "start_page": int(row["start_page"]),
+                    "end_page": int(row["end_page"]),
+                })
+        return manifest
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def process_document(pdf_path: str, out_dir: str, chapters: list[dict] | None,
+                     num_chapters: int, run_ai: bool, max_part_bytes: int | None = None,
+                     skip_duplicates: bool = False) -> dict:
+    """Split and analyze one PDF into out_dir. Runs inside a pool worker."""
+    if not chapters:
+        with MappedPdf(pdf_path) as source:
+            reader = source.reader()
+            total_pages = len(reader.pages)
+            if total_pages == 0:
+                raise ValueError("PDF has no pages")
+            if max_part_bytes:
+                chapters = size_bounded_chapters(PageSizeModel(reader), max_part_bytes)
+            else:
+                chapters = even_chapters(total_pages, min(num_chapters, total_pages))
+    for ch in chapters:
+        if ch["start_page"] > ch["end_page"]:
+            raise ValueError(f"'{ch['name']}': Start ({ch['start_page']}) > End ({ch['end_page']})")
+    if skip_duplicates:
+        from page_similarity import PageSimilarityIndex
+        # One extra pass over the text; only word hashes are kept, not the pages
+        with MappedPdf(pdf_path) as source:
+            index = PageSimilarityIndex.from_texts(text for _, text in iter_page_texts(source))
+        chapters = skip_pages(chapters, index.near_duplicates())
+
+    # Streaming keeps memory bounded by the largest chapter, even for multi-GB scans
+    report = stream_document(pdf_path, chapters, out_dir, run_ai)
+
+    tmp = os.path.join(out_dir, REPORT_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, REPORT_NAME))  # Atomic: marks the document done
+    return report
+
+
+def _run_one(pdf_path: str, out_dir: str, chapters, num_chapters: int, run_ai: bool,
+             max_part_bytes: int | None, skip_duplicates: bool) -> dict:
+    try:
+        report = process_document(pdf_path, out_dir, chapters, num_chapters, run_ai, max_part_bytes,
+                                  skip_duplicates)
+        return {"file": pdf_path, "ok": True, "chapters": len(report["chapters"]), "seconds": report["seconds"]}
+    except Exception as e:
+        return {"file": pdf_path, "ok": False, "error": f"{type(e).__name__}: {e}",
+                "traceback": traceback.format_exc()}
+
+
+def run_batch(input_dir: str, output_dir: str, manifest: dict | None = None, num_chapters: int = 1,
+              run_ai: bool = True, workers: int | None = None, force: bool = False, log=print,
+              max_part_bytes: int | None = None, skip_duplicates: bool = False) -> list[dict]:
+    """Process every PDF in input_dir across a process pool; returns one result per file."""
+    pdfs = sorted(
+        name for name in os.listdir(input_dir)
+        if name.lower().endswith(".pdf") and (manifest is None or name in manifest)
+    )
+    results, jobs = [], []
+    for name in pdfs:
+        out_dir = os.path.join(output_dir, os.path.splitext(name)[0])
+        if not force and os.path.exists(os.path.join(out_dir, REPORT_NAME)):
+            results.append({"file": os.path.join(input_dir, name), "ok": True, "skipped": True})
+            continue
+        chapters = manifest.get(name) if manifest else None
+        jobs.append((os.path.join(input_dir, name), out_dir, chapters, num_chapters, run_ai,
+                     max_part_bytes, skip_duplicates))
+
+    log(f"{len(pdfs)} PDF(s): {len(jobs)} to process, {len(results)} already done")
+    if not jobs:
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(workers or DEFAULT_WORKERS, len(jobs)),
+                             mp_context=multiprocessing.get_context(POOL_START_METHOD)) as pool:
+        futures = [pool.submit(_run_one, *job) for job in jobs]
+        for done, fut in enumerate(as_completed(futures), 1):
+            result = fut.result()
+            results.append(result)
+            status = f"ok ({result['seconds']}s)" if result["ok"] else f"FAILED {result['error']}"
+            log(f"[{done}/{len(jobs)}] {os.path.basename(result['file'])}: {status}")
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Split and analyze a directory of PDFs.")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    spec = parser.add_mutually_exclusive_group()
+    spec.add_argument("--manifest", help="JSON or CSV file of chapter ranges per PDF")
+    spec.add_argument("--chapters", type=int, default=1, help="Even split into N chapters (default: 1)")
+    spec.add_argument("--max-part-mb", type=float, default=None,
+                      help="Split into parts estimated at or under this many MB each")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: $PDF_WORKERS or CPU count)")
+    parser.add_argument("--no-ai", action="store_true", help="Only split; skip summaries and keywords")
+    parser.add_argument("--skip-duplicates", action="store_true",
+                        help="Leave near-duplicate pages (repeated covers, disclaimers) out of parts and analysis")
+    parser.add_argument("--force", action="store_true", help="Reprocess documents that already have a report")
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest(args.manifest) if args.manifest else None
+    max_part_bytes = int(args.max_part_mb * 1024 * 1024) if args.max_part_mb else None
+    results = run_batch(args.input_dir, args.output_dir, manifest, args.chapters,
+                        not args.no_ai, args.workers, args.force, max_part_bytes=max_part_bytes,
+                        skip_duplicates=args.skip_duplicates)
+    failed = [r for r in results if not r["ok"]]
+    print(f"Done: {len(results) - len(failed)} succeeded, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+"""
+Benchmark Module — Reproducible timings on a synthetic PDF corpus.
+
+    python benchmark.py run --out bench.json
+    python benchmark.py run --scales 10,500 --kinds text --out bench.json --baseline baseline.json
+    python benchmark.py compare baseline.json bench.json --threshold 0.15
+
+The corpus is generated with pypdf from fixed seeds (text- or image-heavy
+pages, one shared font or a font per page) and cached on disk. Every
+scenario runs in a fresh process, so its peak RSS is its own, and every
+module's cold import time is probed in a fresh interpreter. Compare mode
+flags stages that got slower than the threshold, and light modules that
+started importing heavy ones, and exits non-zero.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from pypdf import PdfReader, PdfWriter, __version__ as PYPDF_VERSION
+from pypdf.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject, NumberObject, StreamObject
+
+import perf
+
+DEFAULT_SCALES = (10, 500, 5000)
+KINDS = ("text", "image")
+FONT_MODES = ("shared", "per-page")
+BENCH_CHAPTERS = 10
+IMAGE_SIZE = 96  # Pixels per side of each page's grayscale image
+LINES_PER_PAGE = 40
+VOCAB_SIZE = 5000
+DEFAULT_THRESHOLD = 0.15  # Relative slowdown that counts as a regression
+MIN_DELTA_SECONDS = 0.005  # Smaller absolute changes are noise
+
+IMPORT_MODULES = ("perf", "jobs", "output_store", "ai_engine", "analytics", "search_index",
+                  "pdf_processor", "doc_cache", "pipeline")
+LIGHT_MODULES = ("perf", "jobs", "output_store", "ai_engine", "analytics")  # Loaded before any upload
+HEAVY_MODULES = ("pypdf", "numpy", "scipy", "sklearn", "plotly", "pandas")
+IMPORT_PROBE = (
+    "import importlib, json, sys, time\n"
+    "started = time.perf_counter()\n"
+    "importlib.import_module(sys.argv[1])\n"
+    "seconds = time.perf_counter() - started\n"
+    "print(json.dumps({'seconds': seconds, 'heavy': [m for m in sys.argv[2:] if m in sys.modules]}))\n"
+)
+
+
+# ── Synthetic corpus ───────────────────────────────────────────
+
+def _vocabulary(rnd: random.Random) -> tuple[list[str], list[float]]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rnd.choice(letters) for _ in range(rnd.randint(2, 11))) for _ in range(VOCAB_SIZE)]
+    weights = [1 / (rank + 1) for rank in range(VOCAB_SIZE)]  # Zipfian, like natural text
+    return words, weights
+
+
+def _font(writer: PdfWriter, name: str) -> object:
+    descriptor = DictionaryObject({
+        NameObject("/Type"): NameObject("/FontDescriptor"),
+        NameObject("/FontName"): NameObject(f"/{name}"),
+        NameObject("/Flags"): NumberObject(32),
+        NameObject("/Ascent"): NumberObject(718),
+        NameObject("/Descent"): NumberObject(-207),
+        NameObject("/CapHeight"): NumberObject(718),
+        NameObject("/ItalicAngle"): NumberObject(0),
+        NameObject("/StemV"): NumberObject(88),
+        NameObject("/FontBBox"): ArrayObject([NumberObject(v) for v in (-166, -225, 1000, 931)]),
+    })
+    return writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject(f"/{name}"),
+        NameObject("/FirstChar"): NumberObject(32),
+        NameObject("/LastChar"): NumberObject(126),
+        NameObject("/Widths"): ArrayObject([NumberObject(500 + (c * 7) % 300) for c in range(32, 127)]),
+        NameObject("/FontDescriptor"): writer._add_object(descriptor),
+    }))
+
+
+def _image(writer: PdfWriter, rnd: random.Random) -> object:
+    image = StreamObject()
+    image.set_data(rnd.randbytes(IMAGE_SIZE * IMAGE_SIZE))
+    image.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Image"),
+        NameObject("/Width"): NumberObject(IMAGE_SIZE),
+        NameObject("/Height"): NumberObject(IMAGE_SIZE),
+        NameObject("/ColorSpace"): NameObject("/DeviceGray"),
+        NameObject("/BitsPerComponent"): NumberObject(8),
+    })
+    image = image.flate_encode()
+    return writer._add_object(image)
+
+
+def make_synthetic_pdf(pages: int, kind: str = "text", fonts: str = "shared", seed: int = 0) -> bytes:
+    """A deterministic PDF for benchmarking.
+
+    "text" pages carry LINES_PER_PAGE lines of Zipfian prose, with a
+    "Chapter N" heading every 50 pages; "image" pages carry a grayscale
+    image each, and a one-line caption on every other page. `fonts` is
+    "shared" (one font object) or "per-page" (a distinct font per page).
+    """
+    rnd = random.Random(seed)
+    words, weights = _vocabulary(rnd)
+    writer = PdfWriter()
+    shared_font = _font(writer, "BenchSans")
+    for i in range(pages):
+        page = writer.add_blank_page(612, 792)
+        resources = DictionaryObject()
+        ops = []
+        if kind == "image":
+            resources[NameObject("/XObject")] = DictionaryObject({NameObject("/Im0"): _image(writer, rnd)})
+            ops.append("q 512 0 0 512 50 200 cm /Im0 Do Q")
+            lines = [f"Figure {i + 1}. " + " ".join(rnd.choices(words, weights, k=8))] if i % 2 == 0 else []
+        else:
+            lines = [" ".join(rnd.choices(words, weights, k=rnd.randint(8, 14))).capitalize() + "."
+                     for _ in range(LINES_PER_PAGE)]
+            if i % 50 == 0:
+                lines.insert(0, f"Chapter {i // 50 + 1}")
+        if lines:
+            font = shared_font if fonts == "shared" else _font(writer, f"BenchSans{i}")
+            resources[NameObject("/Font")] = DictionaryObject({NameObject("/F1"): font})
+            ops.append("BT /F1 11 Tf 50 750 Td 14 TL")
+            ops.extend(f"({line}) Tj T*" for line in lines)
+            ops.append("ET")
+        contents = DecodedStreamObject()
+        contents.set_data("\n".join(ops).encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(contents.flate_encode())
+        page[NameObject("/Resources")] = resources
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def corpus_path(corpus_dir: str, pages: int, kind: str, fonts: str, seed: int) -> str:
+    """Generate a corpus file once; later runs reuse it."""
+    path = os.path.join(corpus_dir, f"{kind}-{fonts}-{pages}-s{seed}.pdf")
+    if not os.path.exists(path):
+        os.makedirs(corpus_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(make_synthetic_pdf(pages, kind, fonts, seed))
+        os.replace(tmp, path)
+    return path
+
+
+# ── Scenarios ──────────────────────────────────────────────────
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux (bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _run_stages(path: str, workers: int) -> perf.Trace:
+    from pdf_processor import even_chapters, extract_page_texts, get_chapter_texts, split_pdf_to_buffers
+    from ai_engine import _load_sklearn, analyze, compute_reading_stats, extract_keywords_batch, generate_summary
+
+    _load_sklearn()  # Import cost is measured by the imports scenario, not inside a stage
+    with perf.tracing("benchmark") as trace:
+        with perf.stage("parse") as timer:
+            with open(path, "rb") as f:
+                data = f.read()
+            reader = PdfReader(io.BytesIO(data))
+            timer.record(pages=len(reader.pages), nbytes=len(data))
+        total_pages = len(reader.pages)
+        chapters = even_chapters(total_pages, min(BENCH_CHAPTERS, total_pages))
+
+        with perf.stage("extract_page_texts", pages=total_pages):
+            page_texts = extract_page_texts(reader, data=path, workers=workers)
+        with perf.stage("compute_reading_stats"):
+            compute_reading_stats("\n".join(page_texts))
+        chapter_texts = get_chapter_texts(page_texts, chapters)
+        with perf.stage("analyze"):
+            analyses = [analyze(text) for text in chapter_texts]
+        with perf.stage("generate_summary"):
+            for a in analyses:
+                generate_summary(a)
+        with perf.stage("extract_keywords_batch"):
+            extract_keywords_batch(analyses)
+        with perf.stage("split_pdf_to_buffers", pages=total_pages) as timer:
+            results = split_pdf_to_buffers(reader, chapters, data=path, workers=workers)
+            timer.record(nbytes=sum(r["size"] for r in results))
+    return trace
+
+
+def run_scenario(path: str, workers: int = 1, repeat: int = 1) -> dict:
+    """Time every stage on one corpus file; runs in its own process. Keeps the fastest repeat."""
+    best: dict[str, dict] = {}
+    for _ in range(repeat):
+        for s in _run_stages(path, workers).stages:
+            if s.depth == 0 and (s.name not in best or s.seconds < best[s.name]["seconds"]):
+                best[s.name] = {"seconds": round(s.seconds, 6), "pages": s.pages, "bytes": s.nbytes}
+    return {"stages": best, "peak_rss_mb": _peak_rss_mb()}
+
+
+def measure_imports(repeat: int = 3) -> dict:
+    """Cold import time of each module in a fresh interpreter, plus the heavy modules it pulls in."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    stages, heavy = {}, {}
+    for module in IMPORT_MODULES:
+        best = None
+        for _ in range(max(repeat, 1)):
+            out = subprocess.run([sys.executable, "-c", IMPORT_PROBE, module, *HEAVY_MODULES],
+                                 cwd=root, capture_output=True, text=True, check=True)
+            probe = json.loads(out.stdout)
+            if best is None or probe["seconds"] < best["seconds"]:
+                best = probe
+        stages[f"import {module}"] = {"seconds": round(best["seconds"], 6), "pages": 0, "bytes": 0}
+        heavy[module] = best["heavy"]
+    return {"scenario": "imports", "stages": stages, "heavy_modules": heavy, "peak_rss_mb": None}
+
+
+def scenario_name(kind: str, fonts: str, pages: int) -> str:
+    return f"{kind}-{fonts}-{pages}"
+
+
+def run_benchmarks(scales, kinds, font_modes, corpus_dir: str, workers: int = 1,
+                   repeat: int = 1, seed: int = 0, imports: bool = True, log=print) -> dict:
+    """Run the import probe and the scenario matrix; returns the JSON-ready results document."""
+    results = []
+    if imports:
+        result = measure_imports(max(repeat, 3))
+        results.append(result)
+        slowest = max(result["stages"].items(), key=lambda kv: kv[1]["seconds"])
+        log(f"imports: slowest {slowest[0]} {slowest[1]['seconds']:.3f}s")
+    spawn = get_context("spawn")
+    for pages in scales:
+        for kind in kinds:
+            for fonts in font_modes:
+                name = scenario_name(kind, fonts, pages)
+                path = corpus_path(corpus_dir, pages, kind, fonts, seed)
+                # A fresh interpreter per scenario keeps peak RSS and caches independent
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                    result = pool.submit(run_scenario, path, workers, repeat).result()
+                result.update({"scenario": name, "pages": pages, "kind": kind, "fonts": fonts,
+                               "pdf_bytes": os.path.getsize(path)})
+                results.append(result)
+                total = sum(s["seconds"] for s in result["stages"].values())
+                log(f"{name}: {total:.3f}s, peak RSS {result['peak_rss_mb']} MB")
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pypdf": PYPDF_VERSION,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "workers": workers,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+# ── Compare ────────────────────────────────────────────────────
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """Stage timings and peak RSS per scenario, flagging regressions beyond `threshold`."""
+    base = {r["scenario"]: r for r in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = base.get(result["scenario"])
+        if old is None:
+            continue
+        metrics = [(stage, old["stages"][stage]["seconds"], s["seconds"])
+                   for stage, s in result["stages"].items() if stage in old["stages"]]
+        if old["peak_rss_mb"] is not None and result["peak_rss_mb"] is not None:
+            metrics.append(("peak_rss_mb", old["peak_rss_mb"], result["peak_rss_mb"]))
+        # A light module that starts pulling in pypdf, numpy or plotly slows every cold start
+        for module in LIGHT_MODULES:
+            before = set(old.get("heavy_modules", {}).get(module, []))
+            after = set(result.get("heavy_modules", {}).get(module, []))
+            if after - before:
+                rows.append({
+                    "scenario": result["scenario"], "metric": f"heavy imports of {module}",
+                    "baseline": len(before), "current": len(after), "ratio": None, "regression": True,
+                })
+        for metric, before, after in metrics:
+            ratio = after / before if before else float("inf") if after else 1.0
+            noise = metric != "peak_rss_mb" and after - before < MIN_DELTA_SECONDS
+            rows.append({
+                "scenario": result["scenario"], "metric": metric, "baseline": before, "current": after,
+                "ratio": round(ratio, 3), "regression": ratio > 1 + threshold and not noise,
+            })
+    return rows
+
+
+def print_comparison(rows: list[dict], log=print):
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else ""
+        ratio = "" if row["ratio"] is None else f"x{row['ratio']}"
+        log(f"{row['scenario']:<22} {row['metric']:<28} {row['baseline']:>10} -> {row['current']:>10}"
+            f"  {ratio:<7} {flag}")
+    regressions = sum(r["regression"] for r in rows)
+    log(f"{regressions} regression(s) in {len(rows)} metric(s)")
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the PDF pipeline on a synthetic corpus.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmark matrix")
+    run.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="Page counts, comma-separated")
+    run.add_argument("--kinds", default=",".join(KINDS), help="text and/or image")
+    run.add_argument("--fonts", default=",".join(FONT_MODES), help="shared and/or per-page")
+    run.add_argument("--workers", type=int, default=1, help="Extraction/split workers (default: 1, serial)")
+    run.add_argument("--repeat", type=int, default=1, help="Runs per scenario; the fastest is kept")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "pdf_bench_corpus"))
+    run.add_argument("--out", default="bench.json")
+    run.add_argument("--baseline", help="Compare against this results file when done")
+    run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    run.add_argument("--skip-imports", action="store_true", help="Don't measure module import times")
+
+    cmp = sub.add_parser("compare", help="Compare two results files")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        current = run_benchmarks(
+            [int(s) for s in args.scales.split(",")], args.kinds.split(","), args.fonts.split(","),
+            args.corpus_dir, args.workers, args.repeat, args.seed, not args.skip_imports,
+        )
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"Wrote {args.out}")
+        if not args.baseline:
+            return 0
+        baseline = _load(args.baseline)
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+
+    rows = compare(baseline, current, args.threshold)
+    print_comparison(rows)
+    return 1 if any(r["regression"] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
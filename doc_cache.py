@@ -0,0 +1,355 @@
+"""
+Document Cache Module — Content-addressed cache of parsed PDFs shared across sessions.
+"""
+
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from pypdf import PdfReader
+
+import perf
+from jobs import JobManager
+from pdf_processor import (
+    MappedPdf, PageSizeModel, PageTextStore, heading_chapters, outline_chapters,
+)
+from ai_engine import PageStats, estimate_reading_stats
+from search_index import PageIndex
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB across all cached documents
+READER_OVERHEAD = 1  # Parsed objects are roughly the file size; the bytes themselves are mmapped
+SAMPLE_PAGES = 20  # Pages read for the quick overview estimate
+BACKGROUND_EXACT_MAX_PAGES = 1000  # Larger documents keep the estimate until text is needed
+BACKGROUND_SESSION = "document-cache"  # Session id of cache-owned jobs, so no user session cancels them
+MAX_ARTIFACTS = 16  # Memoized charts etc. kept per document (one set per chapter layout)
+MAX_CHAPTER_ANALYSES = 256  # Memoized chapter analyses kept per document (one per page range)
+DUPLICATE_ENTRY_BYTES = 100  # Approximate size of one near-duplicate dict entry
+TERM_ENTRY_BYTES = 100  # Approximate size of one term-count entry in a memoized analysis
+
+
+def document_id(data) -> str:
+    """SHA-256 hex digest of the raw PDF bytes (bytes or a binary file object)."""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(data).hexdigest()
+    data.seek(0)
+    return hashlib.file_digest(data, "sha256").hexdigest()
+
+
+@dataclass
+class CachedDocument:
+    """A parsed PDF plus everything derived from it."""
+    doc_id: str
+    source: MappedPdf
+    reader: PdfReader
+    page_texts: PageTextStore
+    stats: dict | None = None
+    page_stats: PageStats | None = None
+    search_index: PageIndex | None = None
+    estimate: dict | None = None
+    # (start_page, end_page, skip_pages) -> memoized AI results, least recently used first
+    chapter_analyses: OrderedDict = field(default_factory=OrderedDict, repr=False)
+    outline: list[dict] | None = None  # Chapters from bookmarks; [] when there are none
+    detected: tuple[list[dict], str] | None = None  # (chapters, source) once detection settled
+    size_model: PageSizeModel | None = None  # Per-page serialized sizes for size-bounded splits
+    duplicates: dict[int, int] | None = None  # Near-duplicate page -> the page it repeats (0-based)
+    artifacts: OrderedDict = field(default_factory=OrderedDict, repr=False)  # key -> memoized chart etc.
+    # Three locks, none ever held for a whole job: `lock` for quick reads and writes of the
+    # fields above, `build_lock` while a derived field is computed once, and `reader_lock`
+    # around serial use of `reader` (shared with page_texts and the splitter)
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+    build_lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+    reader_lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+    _background: object = field(default=None, repr=False)  # Job upgrading the estimate, once queued
+
+    @property
+    def total_pages(self) -> int:
+        return len(self.reader.pages)
+
+    @property
+    def path(self) -> str:
+        """On-disk copy that readers, extractors and splitter workers all map."""
+        return self.source.path
+
+    def nbytes(self) -> int:
+        """Approximate resident size of this entry."""
+        size = self.source.size * READER_OVERHEAD + self.page_texts.nbytes()
+        if self.page_stats is not None:
+            size += self.page_stats.nbytes()
+        if self.search_index is not None:
+            size += self.search_index.nbytes()
+        if self.size_model is not None:
+            size += self.size_model.nbytes()
+        if self.duplicates is not None:
+            size += len(self.duplicates) * DUPLICATE_ENTRY_BYTES
+        with self.lock:
+            analyses = list(self.chapter_analyses.values())
+        size += sum(len(a["term_counts"]) * TERM_ENTRY_BYTES + len(a["summary"]) for a in analyses)
+        return size
+
+
+class DocumentCache:
+    """Thread-safe LRU cache of CachedDocument, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, extract_workers: int | None = None,
+                 root: str | None = None, jobs: JobManager | None = None):
+        self.max_bytes = max_bytes
+        self.extract_workers = extract_workers
+        self.jobs = jobs  # Background stats run here, under its server-wide cap; none without it
+        self.root = root or tempfile.mkdtemp(prefix="pdf_docs_")
+        if root is None:
+            atexit.register(shutil.rmtree, self.root, True)
+        self._entries: OrderedDict[str, CachedDocument] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        # Every document still referenced anywhere (jobs, running scripts), evicted or not
+        self._live: weakref.WeakValueDictionary[str, CachedDocument] = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._entries
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def get(self, doc_id: str) -> CachedDocument | None:
+        """Return a cached document and mark it most recently used."""
+        with self._lock:
+            doc = self._entries.get(doc_id)
+            if doc is not None:
+                self._entries.move_to_end(doc_id)
+            return doc
+
+    def get_or_load(self, data, doc_id: str | None = None) -> CachedDocument:
+        """Return the cached parse of `data` (bytes or a binary file object), parsing it on a miss.
+
+        Pass a `doc_id` already computed with document_id() to skip hashing.
+        On a miss the bytes are persisted once to a temp file and memory-mapped;
+        every reader and worker process then shares that one view. The file
+        is deleted only once nothing references the document any more.
+        """
+        if doc_id is None:
+            with perf.stage("hash"):
+                doc_id = document_id(data)
+        doc = self.get(doc_id) or self._revive(doc_id)
+        if doc is not None:
+            return doc
+
+        # Persist and parse outside the cache lock so other sessions aren't blocked.
+        # Each load gets its own file, so a previous copy being released can't unlink it.
+        with perf.stage("load_document") as timer:
+            path = os.path.join(self.root, f"{doc_id}.{uuid.uuid4().hex[:8]}.pdf")
+            with open(path, "wb") as f:
+                if isinstance(data, (bytes, bytearray, memoryview)):
+                    f.write(data)
+                else:
+                    data.seek(0)
+                    shutil.copyfileobj(data, f)
+            source = MappedPdf(path)
+            reader = source.reader()
+            timer.record(pages=len(reader.pages), nbytes=source.size)
+        reader_lock = threading.RLock()
+        doc = CachedDocument(
+            doc_id=doc_id, source=source, reader=reader,
+            page_texts=PageTextStore(reader, path, self.extract_workers, reader_lock),
+            reader_lock=reader_lock,
+        )
+        # Runs when the last reference goes (jobs and worker pools hold one while they use
+        # doc.path), not when the entry is evicted
+        weakref.finalize(doc, _release_source, source)
+        with self._lock:
+            existing = self._entries.get(doc_id)
+            if existing is not None:
+                self._entries.move_to_end(doc_id)
+                return existing
+            self._entries[doc_id] = doc
+            self._live[doc_id] = doc
+            self._sizes[doc_id] = doc.nbytes()
+            self._evict()
+        return doc
+
+    def _revive(self, doc_id: str) -> CachedDocument | None:
+        """Put an evicted document that is still in use back into the cache, instead of reloading it."""
+        with self._lock:
+            doc = self._live.get(doc_id)
+            if doc is not None and doc_id not in self._entries:
+                self._entries[doc_id] = doc
+                self._sizes[doc_id] = doc.nbytes()
+                self._evict()
+            return doc
+
+    def ensure_texts(self, doc: CachedDocument, progress=None) -> CachedDocument:
+        """Extract every page, then build per-page and exact stats and the search index once."""
+        doc.page_texts.ensure(range(doc.total_pages), progress)
+        if doc.stats is not None:
+            return doc
+        with doc.build_lock:
+            if doc.stats is None:
+                doc.page_stats = PageStats.from_texts(doc.page_texts)
+                doc.stats = doc.page_stats.range_stats(1, doc.total_pages)
+                doc.search_index = PageIndex.from_texts(doc.page_texts)
+        self.update(doc)
+        return doc
+
+    def ensure_chapter_texts(self, doc: CachedDocument, chapters: list[dict], progress=None):
+        """Extract only the pages the given chapters cover."""
+        doc.page_texts.ensure_chapters(chapters, progress)
+        self.update(doc)
+
+    def detect_chapters(self, doc: CachedDocument, read_text: bool = False,
+                        progress=None) -> tuple[list[dict], str] | None:
+        """Detected chapters as (chapters, source), or None while headings can't be scanned yet.
+
+        The outline is read once and needs no text. Without one, the heading
+        heuristic waits until every page's text is available, or extracts it
+        now when `read_text` is set.
+        """
+        if doc.detected is not None:
+            return doc.detected
+        if doc.outline is None:
+            with doc.reader_lock, perf.stage("detect_chapters.outline"):
+                if doc.outline is None:
+                    doc.outline = outline_chapters(doc.reader)
+        if doc.outline:
+            doc.detected = (doc.outline, "outline")
+            return doc.detected
+        if read_text:
+            self.ensure_texts(doc, progress)
+        if doc.page_texts.is_complete:
+            with perf.stage("detect_chapters.headings", pages=doc.total_pages):
+                chapters = heading_chapters(doc.page_texts)
+            doc.detected = (chapters, "headings" if chapters else "")
+        return doc.detected
+
+    def artifact(self, doc: CachedDocument, key: tuple, build):
+        """Memoize `build()` (e.g. a Plotly figure) against the document and `key`.
+
+        The key must capture everything else the artifact depends on, such as
+        the chapter ranges; the least recently used artifacts are dropped.
+        """
+        with doc.lock:
+            if key in doc.artifacts:
+                doc.artifacts.move_to_end(key)
+                return doc.artifacts[key]
+        value = build()
+        with doc.lock:
+            doc.artifacts[key] = value
+            while len(doc.artifacts) > MAX_ARTIFACTS:
+                doc.artifacts.popitem(last=False)
+        return value
+
+    def cached_analyses(self, doc: CachedDocument, keys) -> dict:
+        """Memoized chapter analyses for those of `keys` that have one, marked recently used."""
+        with doc.lock:
+            found = {key: doc.chapter_analyses[key] for key in keys if key in doc.chapter_analyses}
+            for key in found:
+                doc.chapter_analyses.move_to_end(key)
+        return found
+
+    def remember_analyses(self, doc: CachedDocument, analyses: dict) -> None:
+        """Memoize chapter analyses; the least recently used beyond MAX_CHAPTER_ANALYSES are dropped."""
+        with doc.lock:
+            doc.chapter_analyses.update(analyses)
+            while len(doc.chapter_analyses) > MAX_CHAPTER_ANALYSES:
+                doc.chapter_analyses.popitem(last=False)
+        self.update(doc)
+
+    def size_model(self, doc: CachedDocument) -> PageSizeModel:
+        """Per-page size estimates, measured once per document."""
+        if doc.size_model is None:
+            with doc.build_lock, doc.reader_lock:
+                if doc.size_model is None:
+                    doc.size_model = PageSizeModel(doc.reader)
+            self.update(doc)
+        return doc.size_model
+
+    def near_duplicates(self, doc: CachedDocument, progress=None) -> dict[int, int]:
+        """Near-duplicate pages mapped to the first page they repeat (0-based).
+
+        Needs every page's text; MinHash signatures are built once and only
+        the resulting mapping is kept.
+        """
+        if doc.duplicates is not None:
+            return doc.duplicates
+        self.ensure_texts(doc, progress)
+        with doc.build_lock:
+            if doc.duplicates is None:
+                from page_similarity import PageSimilarityIndex  # Loads numpy only when asked
+                doc.duplicates = PageSimilarityIndex.from_texts(doc.page_texts).near_duplicates()
+        self.update(doc)
+        return doc.duplicates
+
+    def image_only_pages(self, doc: CachedDocument) -> list[int]:
+        """0-based pages without a text layer; the cheap pre-scan runs once per document."""
+        if not doc.page_texts.is_scanned:
+            doc.page_texts.scan()
+        return doc.page_texts.image_only_pages
+
+    def overview_stats(self, doc: CachedDocument) -> tuple[dict, bool]:
+        """Return (stats, exact). Falls back to a sampled estimate until exact stats exist."""
+        if doc.stats is not None:
+            return doc.stats, True
+        if doc.estimate is None:
+            with doc.build_lock:
+                if doc.estimate is None:
+                    doc.estimate = estimate_reading_stats(doc.page_texts.sample(SAMPLE_PAGES), doc.total_pages)
+        if self.jobs is not None and doc.total_pages <= BACKGROUND_EXACT_MAX_PAGES:
+            self.start_background_stats(doc)
+        return doc.estimate, False
+
+    def start_background_stats(self, doc: CachedDocument):
+        """Queue the upgrade from estimate to exact stats as a job (once per document).
+
+        It shares the job manager's concurrency cap with split jobs, so
+        simultaneous uploads can't each start a pool of extraction processes.
+        """
+        with doc.lock:
+            if doc.stats is not None or doc._background is not None:
+                return
+            doc._background = self.jobs.submit(BACKGROUND_SESSION, "Exact stats", self._exact_stats_job, doc)
+
+    def _exact_stats_job(self, job, doc: CachedDocument):
+        # Returns nothing: a finished job must not keep the document (and its file) alive
+        self.ensure_texts(doc, progress=lambda done, total: job.report(
+            done / total, f"📖 Reading page {done}/{total}..."))
+
+    def update(self, doc: CachedDocument):
+        """Re-account an entry's size after derived data was added."""
+        with self._lock:
+            if doc.doc_id in self._entries:
+                self._sizes[doc.doc_id] = doc.nbytes()
+                self._evict()
+
+    def clear(self):
+        """Drop every entry; files go once in-flight work lets go of its documents."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+
+    def _evict(self):
+        # Never evict the most recent entry, even if it alone exceeds the budget.
+        # Evicted documents are only dropped from the cache; see _release_source.
+        while len(self._entries) > 1 and self.total_bytes > self.max_bytes:
+            doc_id, _ = self._entries.popitem(last=False)
+            self._sizes.pop(doc_id, None)
+
+
+def _release_source(source: MappedPdf):
+    """Unmap and delete a document's file once no CachedDocument refers to it."""
+    try:
+        source.close()
+    except BufferError:
+        pass  # A view into the map is still alive; the OS frees it with the last one
+    try:
+        os.unlink(source.path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,133 @@
+"""
+Jobs Module — Background execution of split & analysis work outside the script run.
+
+Streamlit reruns the script on every widget interaction, which would
+restart any work done inline. Jobs run on one server-wide thread pool
+instead (heavy stages fan out to their own process pools); the script
+only submits, polls progress and collects results.
+"""
+
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+MAX_CONCURRENT_JOBS = int(os.environ.get("PDF_MAX_JOBS", "0")) or 4  # Across all sessions
+FINISHED_JOB_TTL = 3600  # Seconds an uncollected finished job is kept
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+
+@dataclass
+class Job:
+    """One unit of background work; progress is written by the job and polled by the UI."""
+    id: str
+    session_id: str
+    label: str
+    status: str = QUEUED
+    progress: float = 0.0
+    message: str = "Queued..."
+    result: object = None
+    error: str | None = None
+    finished_at: float | None = None
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _future: Future | None = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def report(self, fraction: float, message: str):
+        """Record progress; raises JobCancelled if the job should stop."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.progress = min(max(fraction, 0.0), 1.0)
+        self.message = message
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool shared by every session."""
+
+    def __init__(self, max_workers: int = MAX_CONCURRENT_JOBS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-job")
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, session_id: str, label: str, fn, *args, **kwargs) -> Job:
+        """Queue `fn(job, *args, **kwargs)`; its return value becomes `job.result`."""
+        self._prune()
+        job = Job(id=uuid.uuid4().hex, session_id=session_id, label=label)
+        with self._lock:
+            self._jobs[job.id] = job
+        job._future = self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str | None) -> Job | None:
+        return self._jobs.get(job_id) if job_id else None
+
+    def jobs_for(self, session_id: str) -> list[Job]:
+        with self._lock:
+            return [j for j in self._jobs.values() if j.session_id == session_id]
+
+    def queue_position(self, job: Job) -> int:
+        """1-based position among queued jobs, or 0 if it is not queued."""
+        with self._lock:
+            queued = [j for j in self._jobs.values() if j.status == QUEUED]
+        return queued.index(job) + 1 if job in queued else 0
+
+    def cancel(self, job_id: str):
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            self._finish(job, CANCELLED, "Cancelled")
+
+    def cancel_session(self, session_id: str):
+        for job in self.jobs_for(session_id):
+            self.cancel(job.id)
+
+    def collect(self, job_id: str) -> Job | None:
+        """Remove and return a finished job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.finished:
+                return self._jobs.pop(job_id)
+        return None
+
+    def _run(self, job: Job, fn, args, kwargs):
+        if job._cancel.is_set():
+            self._finish(job, CANCELLED, "Cancelled")
+            return
+        job.status, job.message = RUNNING, "Starting..."
+        try:
+            job.result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            self._finish(job, CANCELLED, "Cancelled")
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            self._finish(job, FAILED, job.error)
+        else:
+            job.progress = 1.0
+            self._finish(job, DONE, "Done")
+
+    @staticmethod
+    def _finish(job: Job, status: str, message: str):
+        job.status, job.message, job.finished_at = status, message, time.time()
+
+    def _prune(self):
+        # Sessions that went away never collect their jobs
+        cutoff = time.time() - FINISHED_JOB_TTL
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+                del self._jobs[job_id]
@@ -0,0 +1,259 @@
+"""
+Output Store Module — Where generated chapter PDFs live between reruns.
+
+Session state only keeps small handles; the bytes sit in a store with a
+global budget and LRU eviction, so concurrent sessions can't exhaust RAM.
+"""
+
+import atexit
+import io
+from abc import ABC, abstractmethod
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import BinaryIO
+
+import perf
+
+DEFAULT_DISK_BYTES = 4 * 1024 * 1024 * 1024  # 4 GB of spooled chapters across all sessions
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024      # Hot copies kept in RAM for repeat downloads
+ZIP_SPOOL_BYTES = 8 * 1024 * 1024            # ZIPs larger than this are built on disk
+
+
+class OutputExpired(KeyError):
+    """The requested output was evicted or its session was released."""
+
+
+@dataclass(frozen=True)
+class StoredOutput:
+    """Handle to one stored output; cheap to keep in session_state."""
+    key: str
+    session_id: str
+    size: int
+
+
+class OutputStore(ABC):
+    """Base store: LRU bookkeeping shared by all backends."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._handles: OrderedDict[str, StoredOutput] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, handle: StoredOutput) -> bool:
+        return handle.key in self._handles
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(h.size for h in self._handles.values())
+
+    def put(self, session_id: str, data: bytes) -> StoredOutput:
+        return self.put_stream(session_id, io.BytesIO(data))
+
+    def put_stream(self, session_id: str, src: BinaryIO) -> StoredOutput:
+        """Store the remaining contents of a readable file object."""
+        src.seek(0, os.SEEK_END)
+        size = src.tell()
+        src.seek(0)
+        handle = StoredOutput(key=uuid.uuid4().hex, session_id=session_id, size=size)
+        self._write_stream(handle, src)
+        with self._lock:
+            self._handles[handle.key] = handle
+            evicted = self._evict()
+        for old in evicted:
+            self._delete(old)
+        return handle
+
+    def open(self, handle: StoredOutput) -> BinaryIO:
+        """Open a stored output for streaming reads."""
+        self._touch(handle)
+        return self._open(handle)
+
+    def read(self, handle: StoredOutput) -> bytes:
+        with self.open(handle) as f:
+            return f.read()
+
+    def store_chapter(self, session_id: str, pdf: dict) -> dict:
+        """Move a split result's `data` bytes into the store, leaving a `handle`."""
+        pdf = dict(pdf)
+        pdf["handle"] = self.put(session_id, pdf.pop("data"))
+        return pdf
+
+    def release_session(self, session_id: str, keep: set[str] | None = None):
+        """Drop every output belonging to a session, except handle keys in `keep`."""
+        keep = keep or set()
+        with self._lock:
+            released = [h for h in self._handles.values() if h.session_id == session_id and h.key not in keep]
+            for h in released:
+                del self._handles[h.key]
+        for h in released:
+            self._delete(h)
+
+    def _touch(self, handle: StoredOutput):
+        with self._lock:
+            if handle.key not in self._handles:
+                raise OutputExpired(handle.key)
+            self._handles.move_to_end(handle.key)
+
+    def _evict(self) -> list[StoredOutput]:
+        # Never evict the newest output, even if it alone exceeds the budget
+        evicted = []
+        while len(self._handles) > 1 and self.total_bytes > self.max_bytes:
+            _, handle = self._handles.popitem(last=False)
+            evicted.append(handle)
+        return evicted
+
+    # Backend hooks
+    @abstractmethod
+    def _write_stream(self, handle: StoredOutput, src: BinaryIO):
+        """Persist `src` under the handle's key."""
+
+    @abstractmethod
+    def _open(self, handle: StoredOutput) -> BinaryIO:
+        """Open the stored bytes; raise OutputExpired if they are gone."""
+
+    @abstractmethod
+    def _delete(self, handle: StoredOutput):
+        """Drop the stored bytes; a no-op if they are already gone."""
+
+
+class MemoryOutputStore(OutputStore):
+    """Keeps outputs in RAM, bounded by `max_bytes`."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_BYTES):
+        super().__init__(max_bytes)
+        self._data: dict[str, bytes] = {}
+
+    def _write_stream(self, handle, src):
+        self._data[handle.key] = src.read()
+
+    def _open(self, handle):
+        try:
+            return io.BytesIO(self._data[handle.key])
+        except KeyError:
+            raise OutputExpired(handle.key) from None
+
+    def _delete(self, handle):
+        self._data.pop(handle.key, None)
+
+
+class TempDirOutputStore(OutputStore):
+    """Spools outputs to a temp directory, bounded by `max_disk_bytes`.
+
+    The most recently read outputs are also kept in RAM up to
+    `max_memory_bytes` so repeated downloads don't hit the disk.
+    """
+
+    def __init__(self, root: str | None = None, max_disk_bytes: int = DEFAULT_DISK_BYTES,
+                 max_memory_bytes: int = DEFAULT_MEMORY_BYTES):
+        super().__init__(max_disk_bytes)
+        self.root = root or tempfile.mkdtemp(prefix="pdf_outputs_")
+        self.max_memory_bytes = max_memory_bytes
+        self._hot: OrderedDict[str, bytes] = OrderedDict()
+        self._hot_bytes = 0
+        if root is None:
+            atexit.register(shutil.rmtree, self.root, True)
+
+    def path(self, handle: StoredOutput) -> str:
+        return os.path.join(self.root, f"{handle.key}.bin")
+
+    def read(self, handle):
+        self._touch(handle)
+        with self._lock:
+            data = self._hot.get(handle.key)
+            if data is not None:
+                self._hot.move_to_end(handle.key)
+                return data
+        with self._open(handle) as f:
+            data = f.read()
+        self._remember(handle.key, data)
+        return data
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._hot:
+                return
+            self._hot[key] = data
+            self._hot_bytes += len(data)
+            while self._hot_bytes > self.max_memory_bytes:
+                _, old = self._hot.popitem(last=False)
+                self._hot_bytes -= len(old)
+
+    def _write_stream(self, handle, src):
+        with open(self.path(handle), "wb") as f:
+            shutil.copyfileobj(src, f)
+
+    def _open(self, handle):
+        # Evicted or released by another session between the bookkeeping check and here
+        try:
+            return open(self.path(handle), "rb")
+        except FileNotFoundError:
+            raise OutputExpired(handle.key) from None
+
+    def _delete(self, handle):
+        with self._lock:
+            data = self._hot.pop(handle.key, None)
+            if data is not None:
+                self._hot_bytes -= len(data)
+        try:
+            os.unlink(self.path(handle))
+        except FileNotFoundError:
+            pass
+
+
+def build_zip(store: OutputStore, session_id: str, pdfs: list[dict],
+              compresslevel: int | None = None) -> StoredOutput:
+    """Bundle stored chapters into one ZIP and store it as a single output.
+
+    PDF streams are already compressed, so members are STORED by default;
+    pass a `compresslevel` (e.g. 1) for a light deflate instead. The archive
+    is assembled in a spooled temp file, never as a second in-memory copy.
+    """
+    compression = zipfile.ZIP_STORED if compresslevel is None else zipfile.ZIP_DEFLATED
+    with perf.stage("zip") as timer, tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_BYTES) as spool:
+        with zipfile.ZipFile(spool, "w", compression, compresslevel=compresslevel) as zf:
+            for pdf in pdfs:
+                with store.open(pdf["handle"]) as src, zf.open(pdf["file_name"], "w") as dst:
+                    shutil.copyfileobj(src, dst)
+        handle = store.put_stream(session_id, spool)
+        timer.record(nbytes=handle.size)
+    return handle
+
+
+def split_incremental(store: OutputStore, session_id: str, memo: dict, doc_id: str,
+                      chapters: list[dict], settings: tuple, split_fn) -> tuple[list[dict], int]:
+    """Split only chapters whose (doc_id, start, end, skipped pages, settings) wasn't split before.
+
+    `memo` maps those keys to previously stored results and is updated in
+    place; `split_fn(chapters, on_chapter)` splits the missing ones. Outputs
+    of the session not in the new result set are released. Returns the
+    results in chapter order and how many were reused.
+    """
+    from pdf_processor import chapter_file_name  # Keeps pypdf out of this module's import
+
+    def key(ch):
+        return (doc_id, ch["start_page"], ch["end_page"], tuple(ch.get("skip_pages", ())), settings)
+
+    todo = [ch for ch in chapters if key(ch) not in memo or memo[key(ch)]["handle"] not in store]
+    if todo:
+        for pdf in split_fn(todo, lambda pdf: store.store_chapter(session_id, pdf)):
+            memo[key(pdf)] = pdf
+
+    results = []
+    for ch in chapters:
+        # Same pages, possibly a new name: reuse the bytes, refresh the labels
+        pdf = dict(memo[key(ch)], name=ch["name"], file_name=chapter_file_name(ch))
+        results.append(pdf)
+
+    current = {key(ch) for ch in chapters}
+    for k in [k for k in memo if k not in current]:
+        del memo[k]
+    store.release_session(session_id, keep={pdf["handle"].key for pdf in results})
+    return results, len(chapters) - len(todo)
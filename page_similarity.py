@@ -0,0 +1,157 @@
+"""
+Page Similarity Module — Near-duplicate page detection with MinHash and LSH.
+
+Each page's word shingles are reduced to a fixed-size MinHash signature;
+signatures are cut into bands and bucketed (locality-sensitive hashing),
+so only pages sharing a bucket are compared and the cost grows with the
+page count rather than its square.
+"""
+
+import itertools
+import re
+import zlib
+
+import numpy as np
+
+import perf
+
+SHINGLE_WORDS = 3  # Words per shingle
+NUM_PERM = 128  # MinHash permutations per page
+LSH_BANDS = 16  # Bands of NUM_PERM // LSH_BANDS rows; pages agreeing on any band become candidates
+DEFAULT_THRESHOLD = 0.8  # Estimated Jaccard similarity at which pages count as duplicates
+HASH_SEED = 1  # Fixed, so signatures (and results) are identical across runs and processes
+SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)  # Mixes word hashes into one shingle hash
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)  # Numbers and non-ASCII words count, so numbered pages differ
+SIGNATURE_PAGES = 256  # Pages whose words are hashed together before their signatures are taken
+HASH_CHUNK = 1 << 16  # Shingles permuted per vectorized step (NUM_PERM x HASH_CHUNK uint32 = 32 MB)
+
+
+def _shingle_hashes(words: np.ndarray, offsets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Hash every run of SHINGLE_WORDS consecutive words within a page.
+
+    `words` holds 32-bit word hashes of all pages back to back, page i
+    spanning offsets[i]:offsets[i + 1]. Pages shorter than a shingle (e.g.
+    covers) hash all their words as one. Returns (32-bit hashes, page of each).
+    """
+    lengths = np.diff(offsets)
+    page_of_word = np.repeat(np.arange(len(lengths)), lengths)
+    span = np.minimum(lengths, SHINGLE_WORDS)[page_of_word]  # Words per shingle on that page
+    keep = np.arange(len(words)) + span <= offsets[1:][page_of_word]  # Shingle stays within the page
+    hashes = np.zeros(len(words), dtype=np.uint64)
+    for k in range(SHINGLE_WORDS):
+        nxt = np.zeros(len(words), dtype=np.uint64)
+        nxt[:len(words) - k] = words[k:]
+        hashes = hashes * SHINGLE_MULTIPLIER + np.where(k < span, nxt, 0).astype(np.uint64)
+    return (hashes[keep] >> np.uint64(32)).astype(np.uint32), page_of_word[keep]
+
+
+def _word_hashes(text: str | None) -> np.ndarray:
+    """32-bit hashes of a page's words, in order (none for image-only pages)."""
+    words = TOKEN_RE.findall((text or "").lower())
+    return np.fromiter(map(zlib.crc32, map(str.encode, words)), np.uint64, len(words))
+
+
+def _signatures(word_parts: list[np.ndarray], a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """MinHash signatures of consecutive pages given their word hashes.
+
+    Returns (signatures, has_text); pages without shingles keep the
+    all-maximum signature and are marked as having no text.
+    """
+    lengths = [len(w) for w in word_parts]
+    offsets = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+    hashes, pages = _shingle_hashes(np.concatenate(word_parts), offsets)
+    counts = np.bincount(pages, minlength=len(lengths))
+    has_text = counts > 0
+    counts = counts[has_text]
+    signatures = np.full((len(lengths), NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+    if len(hashes):
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        mins = np.empty((NUM_PERM, len(counts)), dtype=np.uint32)
+        # Whole pages per step, so each page's minimum is taken in one reduceat
+        page = 0
+        while page < len(counts):
+            end = max(page + 1, int(np.searchsorted(starts, starts[page] + HASH_CHUNK)))
+            lo = starts[page]
+            hi = starts[end] if end < len(counts) else len(hashes)
+            permuted = a * hashes[lo:hi]
+            permuted += b
+            permuted ^= permuted >> np.uint32(16)
+            mins[:, page:end] = np.minimum.reduceat(permuted, starts[page:end] - lo, axis=1)
+            page = end
+        signatures[has_text] = mins.T
+    return signatures, has_text
+
+
+class PageSimilarityIndex:
+    """MinHash signatures of every page, bucketed by band for near-duplicate lookups."""
+
+    def __init__(self, signatures: np.ndarray, has_text: np.ndarray):
+        self.signatures = signatures  # (pages, NUM_PERM) uint32
+        self.has_text = has_text  # Pages without words (e.g. image-only) are never duplicates
+        self.num_pages = len(signatures)
+
+    @classmethod
+    @perf.timed("similarity_index")
+    def from_texts(cls, page_texts) -> "PageSimilarityIndex":
+        """Signatures for an iterable of page texts (None for image-only), read once in order.
+
+        Pages are hashed SIGNATURE_PAGES at a time, so memory stays bounded
+        by one chunk's words rather than the whole document's.
+        """
+        # x -> (a * x + b) mod 2**32 with odd a, then an xor-shift: each (a, b) is a
+        # permutation of 32-bit hashes, computed in uint32 to halve the memory traffic
+        rng = np.random.default_rng(HASH_SEED)
+        a = rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint32)[:, None] | np.uint32(1)
+        b = rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint32)[:, None]
+
+        signatures, has_text = [], []
+        pages = iter(page_texts)
+        while chunk := list(itertools.islice(pages, SIGNATURE_PAGES)):
+            chunk_signatures, chunk_has_text = _signatures([_word_hashes(text) for text in chunk], a, b)
+            signatures.append(chunk_signatures)
+            has_text.append(chunk_has_text)
+        if not signatures:
+            return cls(np.zeros((0, NUM_PERM), np.uint32), np.zeros(0, bool))
+        return cls(np.concatenate(signatures), np.concatenate(has_text))
+
+    def nbytes(self) -> int:
+        return self.signatures.nbytes + self.has_text.nbytes
+
+    def similarity(self, i: int, j: int) -> float:
+        """Estimated Jaccard similarity of two 0-based pages' shingle sets."""
+        return float(np.mean(self.signatures[i] == self.signatures[j]))
+
+    def near_duplicates(self, threshold: float = DEFAULT_THRESHOLD) -> dict[int, int]:
+        """Map each duplicate page to the first page of its group (0-based).
+
+        A page is compared only with the first page of each LSH bucket it
+        falls into (at most LSH_BANDS comparisons), and matches are merged
+        transitively, so a run of repeated pages forms one group.
+        """
+        rows = NUM_PERM // LSH_BANDS
+        parent = list(range(self.num_pages))
+
+        def root(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets: dict[tuple[int, bytes], int] = {}
+        for i in np.flatnonzero(self.has_text).tolist():
+            sig = self.signatures[i]
+            for band in range(LSH_BANDS):
+                first = buckets.setdefault((band, sig[band * rows:(band + 1) * rows].tobytes()), i)
+                if first == i or root(first) == root(i):
+                    continue
+                if self.similarity(first, i) >= threshold:
+                    ri, rf = root(i), root(first)
+                    parent[max(ri, rf)] = min(ri, rf)  # The earliest page stays the original
+        return {i: root(i) for i in range(self.num_pages) if root(i) != i}
+
+    def duplicate_groups(self, threshold: float = DEFAULT_THRESHOLD) -> list[list[int]]:
+        """Groups of near-identical pages (0-based), each starting with the page that is kept."""
+        groups: dict[int, list[int]] = {}
+        for page, first in sorted(self.near_duplicates(threshold).items()):
+            groups.setdefault(first, [first]).append(page)
+        return list(groups.values())
@@ -3,13 +3,357 @@ PDF Processing Module — PDF reading, text extraction, and splitting.
 """
 
 from pypdf import PdfReader, PdfWriter
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, StreamObject
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import io
+import mmap
+import multiprocessing
+import os
 import re
+import tempfile
+import threading
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager, nullcontext
 
+import perf
 
-def extract_page_texts(reader: PdfReader) -> list[str]:
-    """Extract text from each page of the PDF."""
-    return [page.extract_text() or "" for page in reader.pages]
+DEFAULT_WORKERS = int(os.environ.get("PDF_WORKERS", "0")) or os.cpu_count() or 1
+PARALLEL_MIN_PAGES = 200  # Below this, process start-up costs more than it saves
+PARALLEL_MIN_CHAPTERS = 4  # Fewer chapters than this are written serially
+CHUNKS_PER_WORKER = 4     # Smaller chunks give smoother progress and load balancing
+# Pool processes alive at once across every job in this process, however many pools are open
+MAX_WORKER_PROCESSES = int(os.environ.get("PDF_MAX_PROCESSES", "0")) or DEFAULT_WORKERS
+# Workers start from a clean interpreter instead of forking a server full of threads and locks
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+REOPEN_EVERY_PAGES = 200  # Streaming readers are reopened to drop pypdf's object cache
+
+CHAPTER_HEADING_RE = re.compile(
+    r"^(chapter|part|book|section)\s+(\d+|[ivxlcdm]+|one|two|three|four|five|six|seven|eight|nine|ten)\b",
+    re.IGNORECASE,
+)
+HEADING_MAX_CHARS = 60  # Longer first lines are body text, not titles
+# Captions and notes start pages too, but never open a chapter
+CAPTION_RE = re.compile(r"^(figure|fig\.|table|chart|graph|exhibit|listing|image|photo|source|note)\b", re.IGNORECASE)
+HEADING_MIN_PAGES = 4  # Untagged headings must open chapters this many pages long on average
+
+TEXT_BLOCK_RE = re.compile(rb'(?<![A-Za-z])BT(?![A-Za-z])')  # Every text-showing operator sits in BT ... ET
+MAX_FORM_DEPTH = 3  # How deep to follow nested form XObjects when looking for text
+
+SIZE_SKIP_KEYS = frozenset({"/Parent", "/P"})  # Back-references that don't belong to a page
+PART_OVERHEAD_BYTES = 1024   # Header, catalog, page tree and trailer of each part
+OBJECT_OVERHEAD_BYTES = 48   # "n 0 obj ... endobj", stream keywords and the xref entry
+
+_worker_reader = None
+
+
+class MappedPdf:
+    """A PDF file opened once via mmap; readers over it share one zero-copy view.
+
+    PdfReader(path) would copy the whole file into a BytesIO, so large
+    files are mapped instead and the OS pages them in and out as needed.
+    Readers share the map's file position, so use them from one thread at a time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def size(self) -> int:
+        return len(self._map)
+
+    def reader(self) -> PdfReader:
+        """A fresh reader over the mapped bytes (cheap; no copy of the file)."""
+        return PdfReader(self._map)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _resources_have_text(resources, get_data, depth: int = 0) -> bool:
+    """Fonts in `resources` and a BT operator in the stream, directly or in a nested form."""
+    resources = resources.get_object() if resources is not None else None
+    if not resources:
+        return False
+    # Decompress the stream only if a font could be used; scans usually have none
+    if "/Font" in resources and TEXT_BLOCK_RE.search(get_data()):
+        return True
+    if depth >= MAX_FORM_DEPTH:
+        return False
+    for ref in (resources.get("/XObject") or {}).values():
+        xobj = ref.get_object()
+        if xobj.get("/Subtype") == "/Form" and _resources_have_text(
+            xobj.get("/Resources", resources), xobj.get_data, depth + 1,
+        ):
+            return True
+    return False
+
+
+def page_has_text(page) -> bool:
+    """Cheap pre-scan for a text layer, without running extract_text.
+
+    A page can only show text through a font in its resources and a BT
+    operator in its content (or in a form XObject it draws). When the
+    structure can't be read the page is assumed to have text.
+    """
+    def page_data() -> bytes:
+        contents = page.get_contents()
+        return contents.get_data() if contents is not None else b""
+
+    try:
+        return _resources_have_text(page.get("/Resources"), page_data)
+    except Exception:
+        return True
+
+
+def extract_page_text(page) -> str | None:
+    """Text of one page, or None for an image-only page (extraction skipped)."""
+    if not page_has_text(page):
+        return None
+    return page.extract_text() or ""
+
+
+def _init_worker(source: bytes | str):
+    """Open the worker's own reader from raw bytes or a (memory-mapped) file path."""
+    global _worker_reader
+    _worker_reader = MappedPdf(source).reader() if isinstance(source, str) else PdfReader(io.BytesIO(source))
+
+
+class _ProcessBudget:
+    """Hands out worker-process slots so concurrent pools share MAX_WORKER_PROCESSES."""
+
+    def __init__(self, total: int):
+        self.free = total
+        self._cond = threading.Condition()
+
+    def acquire(self, wanted: int) -> int:
+        """Wait for at least one free slot, then take up to `wanted`; returns how many were taken."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.free > 0)
+            granted = min(max(wanted, 1), self.free)
+            self.free -= granted
+            return granted
+
+    def release(self, count: int):
+        with self._cond:
+            self.free += count
+            self._cond.notify_all()
+
+
+_process_budget = _ProcessBudget(max(MAX_WORKER_PROCESSES, 1))
+
+
+@contextmanager
+def worker_pool(workers: int, source: bytes | str):
+    """A process pool of up to `workers` readers of `source`, within the global process budget."""
+    granted = _process_budget.acquire(workers)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=granted, mp_context=multiprocessing.get_context(POOL_START_METHOD),
+            initializer=_init_worker, initargs=(source,),
+        ) as pool:
+            yield pool
+    finally:
+        _process_budget.release(granted)
+
+
+def _extract_range(start: int, end: int) -> tuple[int, list[str | None]]:
+    return start, [extract_page_text(_worker_reader.pages[i]) for i in range(start, end)]
+
+
+def _chunk_ranges(pages: list[int], num_chunks: int) -> list[tuple[int, int]]:
+    """Group sorted page indices into contiguous [start, end) ranges of bounded size."""
+    size = max(1, -(-len(pages) // max(1, num_chunks)))
+    ranges = []
+    for p in pages:
+        if ranges and ranges[-1][1] == p and ranges[-1][1] - ranges[-1][0] < size:
+            ranges[-1] = (ranges[-1][0], p + 1)
+        else:
+            ranges.append((p, p + 1))
+    return ranges
+
+
+def extract_page_texts(reader: PdfReader, data: bytes | str | None = None,
+                       workers: int | None = None, progress=None) -> list[str]:
+    """Extract text from each page of the PDF.
+
+    With the raw `data` (bytes or a file path) and enough pages, extraction is spread across a
+    process pool of `workers` (default: $PDF_WORKERS or the CPU count);
+    otherwise pages are read serially. Image-only pages are detected by a
+    pre-scan and come back empty without running extract_text.
+    `progress(done, total)` is called as pages complete.
+    """
+    total = len(reader.pages)
+    workers = workers or DEFAULT_WORKERS
+    if data is not None and workers > 1 and total >= PARALLEL_MIN_PAGES:
+        return [t or "" for t in extract_page_texts_parallel(data, list(range(total)), workers, progress)]
+
+    texts = []
+    with perf.stage("extract_text", pages=total):
+        for i, page in enumerate(reader.pages):
+            texts.append(extract_page_text(page) or "")
+            if progress:
+                progress(i + 1, total)
+    return texts
+
+
+def extract_page_texts_parallel(data: bytes | str, pages: list[int], workers: int,
+                                progress=None) -> list[str | None]:
+    """Extract the given sorted page indices in a process pool, each worker parsing its own reader.
+
+    Image-only pages come back as None.
+    """
+    texts: dict[int, str | None] = {}
+    ranges = _chunk_ranges(pages, workers * CHUNKS_PER_WORKER)
+    with perf.stage("extract_text.parallel", pages=len(pages)), worker_pool(min(workers, len(ranges)), data) as pool:
+        futures = [pool.submit(_extract_range, s, e) for s, e in ranges]
+        try:
+            for fut in as_completed(futures):
+                start, chunk = fut.result()
+                texts.update(zip(range(start, start + len(chunk)), chunk))
+                if progress:
+                    progress(len(texts), len(pages))
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)  # e.g. the job was cancelled
+            raise
+    return [texts[p] for p in pages]
+
+
+class PageTextStore:
+    """Lazily extracted, memoized page texts that index and slice like a list.
+
+    Pages are only extracted the first time they are read, so callers that
+    never look at text (e.g. split-only jobs) never pay for extraction.
+    """
+
+    def __init__(self, reader: PdfReader, data: bytes | str | None = None, workers: int | None = None,
+                 lock=None):
+        self.reader = reader
+        self.data = data
+        self.workers = workers or DEFAULT_WORKERS
+        self._texts: list[str | None] = [None] * len(reader.pages)
+        self._has_text: list[bool | None] = [None] * len(reader.pages)  # Pre-scan results
+        self._lock = lock or threading.RLock()  # Pass the lock of everything else sharing `reader`
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            pages = range(*key.indices(len(self)))
+            self.ensure(pages)
+            return [self._texts[i] for i in pages]
+        i = range(len(self))[key]
+        self.ensure([i])
+        return self._texts[i]
+
+    def __iter__(self):
+        return iter(self[:])
+
+    @property
+    def extracted_count(self) -> int:
+        return sum(t is not None for t in self._texts)
+
+    @property
+    def is_complete(self) -> bool:
+        return all(t is not None for t in self._texts)
+
+    @property
+    def is_scanned(self) -> bool:
+        return all(h is not None for h in self._has_text)
+
+    @property
+    def image_only_pages(self) -> list[int]:
+        """Page indices known to have no text layer (from the pre-scan or extraction)."""
+        return [i for i, h in enumerate(self._has_text) if h is False]
+
+    def scan(self, progress=None) -> list[int]:
+        """Pre-scan every unclassified page for a text layer; returns the image-only pages."""
+        todo = [i for i, h in enumerate(self._has_text) if h is None]
+        with perf.stage("text_prescan", pages=len(todo)):
+            for n, i in enumerate(todo):
+                with self._lock:
+                    if self._has_text[i] is None:
+                        self._has_text[i] = page_has_text(self.reader.pages[i])
+                if progress:
+                    progress(n + 1, len(todo))
+        return self.image_only_pages
+
+    def _store(self, i: int, text: str | None):
+        if self._texts[i] is None:
+            self._has_text[i] = text is not None
+            self._texts[i] = text or ""
+
+    def ensure(self, pages, progress=None):
+        """Extract any of the given page indices that are not cached yet."""
+        missing = sorted({i for i in pages if self._texts[i] is None})
+        # Pages the pre-scan already found image-only need no extraction at all
+        with self._lock:
+            for i in [i for i in missing if self._has_text[i] is False]:
+                self._store(i, None)
+        missing = [i for i in missing if self._texts[i] is None]
+        if not missing:
+            return
+        if self.data is not None and self.workers > 1 and len(missing) >= PARALLEL_MIN_PAGES:
+            texts = extract_page_texts_parallel(self.data, missing, self.workers, progress)
+            with self._lock:
+                for i, text in zip(missing, texts):
+                    self._store(i, text)
+            return
+        with perf.stage("extract_text", pages=len(missing)):
+            for n, i in enumerate(missing):
+                # PdfReader is not thread-safe; serialize page access per store
+                with self._lock:
+                    if self._texts[i] is None:
+                        self._store(i, extract_page_text(self.reader.pages[i]))
+                if progress:
+                    progress(n + 1, len(missing))
+
+    def ensure_chapters(self, chapters: list[dict], progress=None):
+        """Extract only the pages covered by the given chapters."""
+        pages = set()
+        for ch in chapters:
+            pages.update(range(ch["start_page"] - 1, min(ch["end_page"], len(self))))
+        self.ensure(pages, progress)
+
+    def sample(self, n: int) -> list[str]:
+        """Texts of up to n evenly spaced pages."""
+        total = len(self)
+        step = max(1, total / max(1, n))
+        pages = sorted({int(k * step) for k in range(min(n, total))})
+        self.ensure(pages)
+        return [self._texts[i] for i in pages]
+
+    def nbytes(self) -> int:
+        return sum(len(t) for t in self._texts if t is not None)
+
+
+def iter_page_texts(source: MappedPdf, pages=None, reopen_every: int = REOPEN_EVERY_PAGES,
+                    reader: PdfReader | None = None):
+    """Yield (page_index, text) one page at a time with bounded memory.
+
+    text is None for image-only pages. Pass the caller's open `reader` to
+    avoid parsing the cross-reference table again; either way it is only
+    reopened every `reopen_every` pages, so parsed objects from earlier
+    pages can be freed.
+    """
+    reader = reader or source.reader()
+    pages = range(len(reader.pages)) if pages is None else pages
+    for n, i in enumerate(pages, 1):
+        yield i, extract_page_text(reader.pages[i])
+        if n % reopen_every == 0:
+            reader = source.reader()
 
 
 def extract_full_text(page_texts: list[str]) -> str:
@@ -17,35 +361,354 @@ def extract_full_text(page_texts: list[str]) -> str:
     return "\n".join(page_texts)
 
 
-def split_pdf_to_buffers(uploaded_file, chapters: list[dict]) -> list[dict]:
-    """Split PDF into chapter byte buffers."""
-    uploaded_file.seek(0)
-    reader = PdfReader(uploaded_file)
-    results = []
+def even_chapters(total_pages: int, num_chapters: int) -> list[dict]:
+    """Default chapters: an even split, with the last chapter taking the remainder."""
+    pages_per_chapter = max(1, total_pages // num_chapters)
+    chapters = []
+    for i in range(num_chapters):
+        start = min(i * pages_per_chapter + 1, total_pages)
+        end = min((i + 1) * pages_per_chapter, total_pages)
+        if i == num_chapters - 1:
+            end = total_pages  # Last chapter gets remaining pages
+        chapters.append({"name": f"Chapter {i+1}", "start_page": start, "end_page": end})
+    return chapters
+
+
+def _chapters_from_starts(starts: list[tuple[int, str]], total_pages: int) -> list[dict]:
+    """Turn sorted (first page, title) pairs into contiguous chapters covering every page."""
+    if starts and starts[0][0] > 1:
+        starts = [(1, "Front Matter")] + starts
+    chapters = []
+    for i, (start, title) in enumerate(starts):
+        end = starts[i + 1][0] - 1 if i + 1 < len(starts) else total_pages
+        chapters.append({"name": title, "start_page": start, "end_page": end})
+    return chapters
+
+
+def _outline_starts(reader: PdfReader, items: list) -> list[tuple[int, str]]:
+    starts = {}
+    for item in items:
+        if isinstance(item, list):
+            continue  # Children of the previous entry
+        try:
+            page = reader.get_destination_page_number(item)
+        except Exception:
+            continue  # Broken or external destination
+        if page is not None and page >= 0 and page + 1 not in starts:
+            starts[page + 1] = (item.title or "").strip() or f"Chapter {len(starts) + 1}"
+    return sorted(starts.items())
 
-    for ch in chapters:
-        writer = PdfWriter()
-        for page_num in range(ch["start_page"] - 1, min(ch["end_page"], len(reader.pages))):
-            writer.add_page(reader.pages[page_num])
 
+def outline_chapters(reader: PdfReader) -> list[dict]:
+    """Chapters from the document outline (bookmarks); no text is extracted.
+
+    Uses the top level, or the first nested level when the top is a single
+    wrapper entry such as the book title. Empty if there is no usable outline.
+    """
+    try:
+        items = reader.outline
+    except Exception:
+        return []
+    starts = _outline_starts(reader, items)
+    while len(starts) < 2:
+        nested = next((item for item in items if isinstance(item, list)), None)
+        if nested is None:
+            return []
+        items = nested
+        starts = _outline_starts(reader, items)
+    return _chapters_from_starts(starts, len(reader.pages))
+
+
+def _first_line(text: str) -> str:
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            return line
+    return ""
+
+
+def heading_chapters(page_texts: list[str]) -> list[dict]:
+    """Chapters from page headings: "Chapter N"-style first lines, else short unique ones.
+
+    Short first lines that repeat (ignoring digits) are running headers, not
+    titles; captions ("Figure 3: ...") and other numbered series sharing a
+    first word are labels, not titles. Empty if no plausible set of at least
+    two headings is found.
+    """
+    firsts = [_first_line(t) for t in page_texts]
+    starts = [(i + 1, line[:HEADING_MAX_CHARS]) for i, line in enumerate(firsts) if CHAPTER_HEADING_RE.match(line)]
+    if len(starts) < 2:
+        keys = [re.sub(r"\d+", "", line).strip().lower() for line in firsts]
+        repeats = Counter(keys)
+        starts = [
+            (i + 1, line) for i, (line, key) in enumerate(zip(firsts, keys))
+            if key and repeats[key] == 1 and len(line) <= HEADING_MAX_CHARS
+            and line[0].isupper() and not line.endswith((".", ",", ";", ":")) and not CAPTION_RE.match(line)
+        ]
+        numbered = [line.split()[0].lower() for _, line in starts if re.search(r"\d", line)]
+        series = {word for word, n in Counter(numbered).items() if n > 1}
+        starts = [(page, line) for page, line in starts if line.split()[0].lower() not in series]
+        if len(starts) * HEADING_MIN_PAGES > len(firsts):
+            return []  # Too many pages qualify: these are not chapter openings
+    if len(starts) < 2:
+        return []
+    return _chapters_from_starts(starts, len(page_texts))
+
+
+class PageSizeModel:
+    """Serialized size of each page's object graph, measured once per document.
+
+    Every indirect object a page reaches (content, fonts, images, ...) is
+    sized once; pages only keep the ids they use. A part's size is then
+    the sum over the distinct objects of its pages, so a font shared by all
+    pages counts once per part, as it does in the written file.
+    """
+
+    def __init__(self, reader: PdfReader):
+        self.sizes: dict[int, int] = {}
+        self.page_objects: list[array] = []
+        with perf.stage("page_size_model", pages=len(reader.pages)):
+            for page in reader.pages:
+                self.page_objects.append(array('q', sorted(self._walk(page))))
+
+    def _measure(self, obj) -> int:
         buf = io.BytesIO()
-        writer.write(buf)
+        if isinstance(obj, StreamObject):
+            # Dictionary alone, plus the still-encoded data the writer copies as is
+            DictionaryObject.write_to_stream(obj, buf)
+            return buf.tell() + len(obj._data) + OBJECT_OVERHEAD_BYTES
+        obj.write_to_stream(buf)
+        return buf.tell() + OBJECT_OVERHEAD_BYTES
+
+    def _walk(self, page) -> set[int]:
+        """Ids of the indirect objects reachable from a page, without following other pages."""
+        seen = set()
+        if page.indirect_reference is not None:
+            seen.add(page.indirect_reference.idnum)
+            self.sizes.setdefault(page.indirect_reference.idnum, self._measure(page))
+        stack = [page]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, DictionaryObject):
+                children = [v for k, v in obj.items() if k not in SIZE_SKIP_KEYS]
+            elif isinstance(obj, ArrayObject):
+                children = list(obj)
+            else:
+                continue
+            for child in children:
+                if not isinstance(child, IndirectObject):
+                    stack.append(child)
+                    continue
+                if child.idnum in seen:
+                    continue
+                target = child.get_object()
+                if isinstance(target, DictionaryObject) and target.get("/Type") == "/Page":
+                    continue  # A link to another page
+                seen.add(child.idnum)
+                if child.idnum not in self.sizes:
+                    self.sizes[child.idnum] = self._measure(target)
+                stack.append(target)
+        return seen
+
+    def part_size(self, start_page: int, end_page: int) -> int:
+        """Estimated file size of a part holding 1-based pages start_page..end_page."""
+        objects = set()
+        for ids in self.page_objects[start_page - 1:end_page]:
+            objects.update(ids)
+        return PART_OVERHEAD_BYTES + sum(self.sizes[i] for i in objects)
+
+    def nbytes(self) -> int:
+        return sum(ids.itemsize * len(ids) for ids in self.page_objects) + len(self.sizes) * 100
 
-        results.append({
+
+def size_bounded_chapters(model: PageSizeModel, max_bytes: int, name: str = "Part") -> list[dict]:
+    """Contiguous parts estimated to stay under max_bytes, chosen in one pass.
+
+    A page is added to the current part unless its not-yet-counted objects
+    would push it over the limit. Estimates count every object in full, so
+    deduplication and compression only make real parts smaller. A single
+    page larger than the limit gets a part of its own.
+    """
+    chapters = []
+    current: set[int] = set()
+    size, start = PART_OVERHEAD_BYTES, 0
+    for i, ids in enumerate(model.page_objects):
+        added = sum(model.sizes[o] for o in ids if o not in current)
+        if i > start and size + added > max_bytes:
+            chapters.append({"name": f"{name} {len(chapters) + 1}", "start_page": start + 1, "end_page": i})
+            current.clear()
+            start = i
+            size = PART_OVERHEAD_BYTES
+            added = sum(model.sizes[o] for o in ids)
+        current.update(ids)
+        size += added
+    if model.page_objects:
+        chapters.append({"name": f"{name} {len(chapters) + 1}", "start_page": start + 1,
+                         "end_page": len(model.page_objects)})
+    return chapters
+
+
+def chapter_pages(ch: dict, total_pages: int) -> list[int]:
+    """0-based pages a chapter holds: its range minus any 1-based `skip_pages`."""
+    pages = range(ch["start_page"] - 1, min(ch["end_page"], total_pages))
+    if not ch.get("skip_pages"):
+        return list(pages)
+    skip = set(ch["skip_pages"])
+    return [i for i in pages if i + 1 not in skip]
+
+
+def skip_pages(chapters: list[dict], pages) -> list[dict]:
+    """Copies of the chapters with the given 0-based pages listed as `skip_pages`.
+
+    A chapter made up only of such pages is kept whole, so no part is empty.
+    """
+    pages = set(pages)
+    result = []
+    for ch in chapters:
+        skip = [i + 1 for i in range(ch["start_page"] - 1, ch["end_page"]) if i in pages]
+        if skip and len(skip) < ch["end_page"] - ch["start_page"] + 1:
+            ch = dict(ch, skip_pages=skip)
+        result.append(ch)
+    return result
+
+
+def chapter_file_name(ch: dict) -> str:
+    """Download file name for a chapter."""
+    name = re.sub(r'[\s/\\:*?"<>|]', '_', ch['name'])  # Outline titles may contain path characters
+    return f"{name}_pages_{ch['start_page']}_to_{ch['end_page']}.pdf"
+
+
+def write_chapter(reader: PdfReader, ch: dict, dedupe: bool = True,
+                  compress: bool = False, drop_unreferenced: bool = True,
+                  out_path: str | None = None) -> dict:
+    """Write one chapter's pages from an already-parsed reader.
+
+    Shared fonts, images and ICC profiles are cloned once per output; with
+    `dedupe`, byte-identical indirect objects are merged as well. With
+    `out_path` the chapter goes straight to disk and the result has no `data`.
+    Pages listed in the chapter's `skip_pages` are left out.
+    """
+    started = time.perf_counter()
+    with perf.stage("write_chapter") as timer:
+        writer = PdfWriter()
+        for page_num in chapter_pages(ch, len(reader.pages)):
+            page = writer.add_page(reader.pages[page_num])
+            if compress:
+                page.compress_content_streams()
+        if dedupe or drop_unreferenced:
+            writer.compress_identical_objects(remove_duplicates=dedupe, remove_unreferenced=drop_unreferenced)
+
+        result = {
             "name": ch["name"],
             "start_page": ch["start_page"],
             "end_page": ch["end_page"],
-            "file_name": f"{ch['name'].replace(' ', '_')}_pages_{ch['start_page']}_to_{ch['end_page']}.pdf",
-            "data": buf.getvalue(),
-        })
+            "file_name": chapter_file_name(ch),
+        }
+        if ch.get("skip_pages"):
+            result["skip_pages"] = ch["skip_pages"]
+        if out_path:
+            writer.write(out_path)
+            result["size"] = os.path.getsize(out_path)
+        else:
+            buf = io.BytesIO()
+            writer.write(buf)
+            result["data"] = buf.getvalue()
+            result["size"] = len(result["data"])
+        timer.record(pages=len(writer.pages), nbytes=result["size"])
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _write_chapter_task(ch: dict, dedupe: bool, compress: bool, drop_unreferenced: bool) -> dict:
+    return write_chapter(_worker_reader, ch, dedupe, compress, drop_unreferenced)
+
 
+def split_pdf_to_buffers(source, chapters: list[dict], dedupe: bool = True,
+                         compress: bool = False, drop_unreferenced: bool = True,
+                         data: bytes | str | None = None, workers: int | None = None,
+                         progress=None, on_chapter=None, lock=None) -> list[dict]:
+    """Split PDF into chapter byte buffers.
+
+    `source` is a parsed PdfReader (reused as-is) or a file-like object.
+    A reader shared with other threads needs their `lock`; it is held per
+    chapter while the reader is used, and not at all by the process pool.
+    With the raw `data` (bytes or a file path) and enough chapters, chapters are written across a
+    process pool instead. Each result also reports its byte `size` and the
+    `seconds` it took; `progress(done, total)` is called per chapter.
+    `on_chapter(result)` may replace each result as soon as it is written,
+    e.g. to spill its bytes to disk before the next chapter is produced.
+    """
+    workers = workers or DEFAULT_WORKERS
+    pages = sum(ch["end_page"] - ch["start_page"] + 1 for ch in chapters)
+    with perf.stage("split", pages=pages) as timer:
+        if data is not None and workers > 1 and len(chapters) >= PARALLEL_MIN_CHAPTERS:
+            results = split_pdf_parallel(data, chapters, workers, dedupe, compress, drop_unreferenced,
+                                         progress, on_chapter)
+        else:
+            if isinstance(source, PdfReader):
+                reader = source
+            else:
+                source.seek(0)
+                reader = PdfReader(source)
+            results = []
+            for ch in chapters:
+                with lock or nullcontext():
+                    result = write_chapter(reader, ch, dedupe, compress, drop_unreferenced)
+                results.append(on_chapter(result) if on_chapter else result)
+                if progress:
+                    progress(len(results), len(chapters))
+        timer.record(nbytes=sum(r["size"] for r in results))
     return results
 
 
+def split_pdf_parallel(source: bytes | str, chapters: list[dict], workers: int | None = None,
+                       dedupe: bool = True, compress: bool = False, drop_unreferenced: bool = True,
+                       progress=None, on_chapter=None) -> list[dict]:
+    """Write chapters across a process pool; results come back in chapter order.
+
+    Workers memory-map the file at `source`; raw bytes are spooled to a
+    temporary file first rather than pickled to every worker.
+    """
+    workers = min(workers or DEFAULT_WORKERS, len(chapters))
+    if not chapters:
+        return []
+
+    tmp_path = None
+    if not isinstance(source, str):
+        fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(source)
+        source = tmp_path
+
+    try:
+        results: list[dict | None] = [None] * len(chapters)
+        with worker_pool(workers, source) as pool:
+            futures = {
+                pool.submit(_write_chapter_task, ch, dedupe, compress, drop_unreferenced): i
+                for i, ch in enumerate(chapters)
+            }
+            try:
+                for done, fut in enumerate(as_completed(futures), 1):
+                    result = fut.result()
+                    results[futures[fut]] = on_chapter(result) if on_chapter else result
+                    if progress:
+                        progress(done, len(chapters))
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)  # e.g. the job was cancelled
+                raise
+        return results
+    finally:
+        if tmp_path:
+            os.unlink(tmp_path)
+
+
 def get_chapter_texts(page_texts: list[str], chapters: list[dict]) -> list[str]:
-    """Extract text for each chapter."""
+    """Extract text for each chapter, leaving out its `skip_pages`."""
     result = []
     for ch in chapters:
-        text = "\n".join(page_texts[ch["start_page"] - 1 : ch["end_page"]])
-        result.append(text)
+        texts = page_texts[ch["start_page"] - 1 : ch["end_page"]]
+        if ch.get("skip_pages"):
+            skip = set(ch["skip_pages"])
+            texts = [t for n, t in enumerate(texts, ch["start_page"]) if n not in skip]
+        result.append("\n".join(texts))
     return result
@@ -0,0 +1,181 @@
+"""
+Perf Module — Stage-level timing instrumentation.
+
+    with perf.tracing("Split PDF") as trace:
+        with perf.stage("split", pages=120) as s:
+            ...
+            s.record(nbytes=size)
+    trace.to_json()
+
+Stages record into the trace active in the current thread (or context).
+With no active trace, stage() returns a shared no-op object, so
+instrumented code costs one context-variable lookup when disabled.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PERF_LOG_PATH = os.environ.get("PDF_PERF_LOG")  # Finished traces are appended here as JSON lines
+
+_current: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar("perf_trace", default=None)
+_log_lock = threading.Lock()
+
+
+class Trace:
+    """Timed stages of one run, in the order they started."""
+
+    def __init__(self, label: str, **meta):
+        self.label = label
+        self.meta = meta
+        self.started_at = time.time()
+        self.seconds: float | None = None
+        self.stages: list[Stage] = []
+        self._t0 = time.perf_counter()
+        self._depth = 0
+
+    def finish(self):
+        """Stop the clock and append the trace to PERF_LOG_PATH, if set."""
+        if self.seconds is not None:
+            return
+        self.seconds = time.perf_counter() - self._t0
+        if PERF_LOG_PATH:
+            line = json.dumps(self.to_dict())
+            with _log_lock, open(PERF_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def totals(self) -> dict[str, dict]:
+        """Seconds, pages and bytes summed per stage name."""
+        totals: dict[str, dict] = {}
+        for s in self.stages:
+            t = totals.setdefault(s.name, {"calls": 0, "seconds": 0.0, "pages": 0, "bytes": 0})
+            t["calls"] += 1
+            t["seconds"] += s.seconds or 0.0
+            t["pages"] += s.pages
+            t["bytes"] += s.nbytes
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            "label": self.label,
+            "started_at": self.started_at,
+            "seconds": self.seconds,
+            "meta": self.meta,
+            "stages": [s.to_dict() for s in self.stages],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+
+class Stage:
+    """One timed stage; use as a context manager and `record()` what it produced."""
+    __slots__ = ("trace", "name", "depth", "start", "seconds", "pages", "nbytes")
+
+    def __init__(self, trace: Trace, name: str, pages: int = 0, nbytes: int = 0):
+        self.trace = trace
+        self.name = name
+        self.depth = 0
+        self.start = 0.0
+        self.seconds: float | None = None
+        self.pages = pages
+        self.nbytes = nbytes
+
+    def record(self, pages: int = 0, nbytes: int = 0):
+        self.pages += pages
+        self.nbytes += nbytes
+
+    def __enter__(self):
+        self.depth = self.trace._depth
+        self.trace._depth += 1
+        self.trace.stages.append(self)
+        self.start = time.perf_counter() - self.trace._t0
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.trace._t0 - self.start
+        self.trace._depth -= 1
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name, "depth": self.depth, "start": round(self.start, 6),
+            "seconds": None if self.seconds is None else round(self.seconds, 6),
+            "pages": self.pages, "bytes": self.nbytes,
+        }
+
+
+class _NullStage:
+    """Stand-in returned while no trace is active."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def record(self, pages: int = 0, nbytes: int = 0):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def current() -> Trace | None:
+    return _current.get()
+
+
+def stage(name: str, pages: int = 0, nbytes: int = 0) -> Stage | _NullStage:
+    """Time a block as `name` in the active trace; a no-op without one."""
+    trace = _current.get()
+    if trace is None:
+        return _NULL_STAGE
+    return Stage(trace, name, pages, nbytes)
+
+
+def timed(name: str | None = None):
+    """Decorator form of stage(); the stage is named after the function by default."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with Stage(trace, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def activate(trace: Trace | None):
+    """Make `trace` (or nothing) the active trace of this context, without a with-block.
+
+    Streamlit reuses the script thread across reruns, so each run must set
+    this explicitly rather than inherit the previous run's trace.
+    """
+    _current.set(trace)
+
+
+@contextmanager
+def tracing(label: str, enabled: bool = True, **meta):
+    """Collect stages into a new Trace for the duration of the block.
+
+    Yields None when disabled, leaving instrumented code on its no-op path.
+    """
+    if not enabled:
+        yield None
+        return
+    trace = Trace(label, **meta)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.finish()
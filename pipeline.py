@@ -0,0 +1,113 @@
+"""
+Pipeline Module — The split & AI analysis run behind the app's action buttons.
+"""
+
+from collections import Counter
+
+import perf
+from pdf_processor import get_chapter_texts, split_pdf_to_buffers
+from ai_engine import analyze, estimate_reading_time, extract_keywords_batch, generate_summaries_batch
+from output_store import split_incremental
+
+
+def _memo_key(ch: dict) -> tuple:
+    return (ch["start_page"], ch["end_page"], tuple(ch.get("skip_pages", ())))
+
+
+def split_and_analyze(job, doc, doc_cache, store, session_id: str, split_memo: dict,
+                      chapters: list[dict], compress: bool, run_ai: bool, trace: bool = False) -> dict:
+    """Split the chapters (and optionally analyze them), reusing unchanged ones.
+
+    Runs as a background job: progress goes to `job.report`, which also
+    raises JobCancelled if the user cancels. `split_memo` is updated in place.
+    With `trace`, the result also carries a perf.Trace of the run's stages.
+    """
+    with perf.tracing(job.label, enabled=trace, pages=doc.total_pages, chapters=len(chapters)) as run_trace:
+        result = _split_and_analyze(job, doc, doc_cache, store, session_id, split_memo,
+                                    chapters, compress, run_ai)
+    if run_trace is not None:
+        result["trace"] = run_trace
+    return result
+
+
+def _split_and_analyze(job, doc, doc_cache, store, session_id: str, split_memo: dict,
+                       chapters: list[dict], compress: bool, run_ai: bool) -> dict:
+    split_share = 0.5 if run_ai else 1.0
+
+    # Only chapters whose page range or settings changed are regenerated
+    # The reader lock is taken per chapter, and only if chapters are written in this thread
+    job.report(0, "✂️ Splitting PDF...")
+    generated, reused = split_incremental(
+        store, session_id, split_memo, doc.doc_id, chapters, (compress,),
+        lambda todo, on_chapter: split_pdf_to_buffers(
+            doc.reader, todo, compress=compress, data=doc.path,
+            progress=lambda done, total: job.report(
+                split_share * done / total, f"✂️ Wrote {done}/{total} chapters..."),
+            on_chapter=on_chapter, lock=doc.reader_lock,
+        ),
+    )
+    result = {
+        "generated_pdfs": generated,
+        "run_summary": f"✂️ {len(generated) - reused} chapter(s) split, {reused} reused",
+    }
+    skipped = sum(len(ch.get("skip_pages", ())) for ch in chapters)
+    if skipped:
+        result["run_summary"] += f" · 🔁 {skipped} duplicate page(s) left out"
+    if not run_ai:
+        return result
+
+    # Reused analyses are taken up front, so the memo's LRU cap cannot drop them mid-run
+    memo = doc_cache.cached_analyses(doc, [_memo_key(ch) for ch in chapters])
+    todo = [ch for ch in chapters if _memo_key(ch) not in memo]
+    job.report(split_share, "📖 Reading chapter pages...")
+    doc_cache.ensure_chapter_texts(
+        doc, todo,
+        progress=lambda done, total: job.report(
+            split_share + 0.25 * done / total, f"📖 Reading page {done}/{total}..."),
+    )
+    analyses = []
+    for i, (ch, ch_text) in enumerate(zip(todo, get_chapter_texts(doc.page_texts, todo))):
+        job.report(0.75 + 0.2 * i / len(todo), f"🧠 Analyzing {ch['name']}... ({i + 1}/{len(todo)} changed)")
+        with perf.stage("analyze", pages=ch["end_page"] - ch["start_page"] + 1, nbytes=len(ch_text)):
+            analyses.append(analyze(ch_text))  # Tokenize each chapter exactly once
+
+    # All changed chapters' sentences are scored together in one vectorized pass
+    job.report(0.95, f"🧠 Summarizing {len(todo)} chapter(s)...")
+    summaries = generate_summaries_batch(analyses)
+    fresh = {
+        _memo_key(ch): {
+            "summary": summary,
+            "reading_time": estimate_reading_time(analysis),
+            "word_count": analysis.word_count,
+            "term_counts": analysis.term_counts,
+        }
+        for ch, analysis, summary in zip(todo, analyses, summaries)
+    }
+    del analyses
+    memo.update(fresh)
+    doc_cache.remember_analyses(doc, fresh)
+
+    # Keywords depend on the whole chapter set, so they are re-ranked every run
+    # from the memoized term counts (one vectorized pass, no re-tokenizing)
+    cached_chapters = [memo[_memo_key(ch)] for ch in chapters]
+    keywords = extract_keywords_batch([c["term_counts"] for c in cached_chapters])
+
+    ai_results = []
+    term_counts = Counter()
+    for ch, cached, ch_keywords in zip(chapters, cached_chapters, keywords):
+        term_counts.update(cached["term_counts"])
+        ai_results.append({
+            "name": ch["name"],
+            "start_page": ch["start_page"],
+            "end_page": ch["end_page"],
+            "summary": cached["summary"],
+            "keywords": ch_keywords,
+            "reading_time": cached["reading_time"],
+            "word_count": cached["word_count"],
+            "skipped_pages": len(ch.get("skip_pages", ())),
+        })
+
+    result["ai_results"] = ai_results
+    result["term_counts"] = term_counts
+    result["run_summary"] += f" · 🧠 {len(todo)} analyzed, {len(chapters) - len(todo)} reused"
+    return result
@@ -0,0 +1,101 @@
+"""
+Search Index Module — Inverted index over page texts for in-document search.
+"""
+
+import math
+import re
+from array import array
+from collections import Counter
+
+import perf
+
+SNIPPET_CONTEXT = 70  # Characters shown on each side of the first match
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)  # Numbers and non-ASCII words too ("ISO 9001", "café")
+MARKDOWN_SPECIAL_RE = re.compile(r'([\\`*_\[\]#<>|])')
+POSTING_OVERHEAD = 150  # Approximate bytes per term for the dict entry and two arrays
+
+
+class PageIndex:
+    """Term -> (pages, counts) postings, as compact sorted arrays of 0-based page numbers."""
+
+    def __init__(self, postings: dict[str, tuple[array, array]], page_texts: list[str]):
+        self.postings = postings
+        self.page_texts = page_texts  # Kept only for snippets
+        self.num_pages = len(page_texts)
+
+    @classmethod
+    @perf.timed("search_index")
+    def from_texts(cls, page_texts: list[str]) -> "PageIndex":
+        pages: dict[str, array] = {}
+        counts: dict[str, array] = {}
+        for i, text in enumerate(page_texts):
+            for term, n in Counter(TOKEN_RE.findall(text.lower())).items():
+                if term not in pages:
+                    pages[term], counts[term] = array('I'), array('I')
+                pages[term].append(i)  # Pages are visited in order, so postings stay sorted
+                counts[term].append(n)
+        return cls({term: (pages[term], counts[term]) for term in pages}, page_texts)
+
+    def nbytes(self) -> int:
+        return sum(
+            POSTING_OVERHEAD + len(pages) * pages.itemsize * 2
+            for pages, _ in self.postings.values()
+        )
+
+    def matching_pages(self, terms: list[str]) -> dict[int, float]:
+        """0-based pages containing every term, scored by summed TF-IDF."""
+        if not terms or any(t not in self.postings for t in terms):
+            return {}
+        # Intersect starting from the rarest term
+        terms = sorted(set(terms), key=lambda t: len(self.postings[t][0]))
+        matched = set(self.postings[terms[0]][0])
+        for t in terms[1:]:
+            matched.intersection_update(self.postings[t][0])
+            if not matched:
+                return {}
+        scores = dict.fromkeys(matched, 0.0)
+        for t in terms:
+            pages, counts = self.postings[t]
+            idf = math.log(1 + self.num_pages / len(pages))
+            for page, n in zip(pages, counts):
+                if page in scores:
+                    scores[page] += (1 + math.log(n)) * idf
+        return scores
+
+    def search(self, query: str, limit: int = 20) -> list[dict]:
+        """Best pages for a query (all terms must appear), with snippets.
+
+        Each hit also carries the run of consecutive matching pages around
+        it (start_page, end_page; 1-based), ready to use as a chapter range.
+        """
+        terms = TOKEN_RE.findall(query.lower())
+        scores = self.matching_pages(terms)
+        if not scores:
+            return []
+        pattern = re.compile(r'\b(' + '|'.join(map(re.escape, set(terms))) + r')\b', re.IGNORECASE)
+        hits = []
+        for page in sorted(scores, key=lambda p: (-scores[p], p))[:limit]:
+            start = end = page
+            while start - 1 in scores:
+                start -= 1
+            while end + 1 in scores:
+                end += 1
+            hits.append({
+                "page": page + 1,
+                "score": round(scores[page], 3),
+                "snippet": _snippet(self.page_texts[page], pattern),
+                "start_page": start + 1,
+                "end_page": end + 1,
+            })
+        return hits
+
+
+def _snippet(text: str, pattern: re.Pattern) -> str:
+    """A short Markdown window of text around the first match, with the match in bold."""
+    m = pattern.search(text)
+    if m is None:
+        return ""
+    lo, hi = max(0, m.start() - SNIPPET_CONTEXT), min(len(text), m.end() + SNIPPET_CONTEXT)
+    snippet = MARKDOWN_SPECIAL_RE.sub(r'\\\1', ' '.join(text[lo:hi].split()))
+    snippet = pattern.sub(lambda w: f"**{w.group(0)}**", snippet)
+    return ("…" if lo > 0 else "") + snippet + ("…" if hi < len(text) else "")
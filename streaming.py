@@ -0,0 +1,83 @@
+"""
+Streaming Module — Bounded-memory split & analysis for very large PDFs.
+
+The document is memory-mapped rather than loaded, page texts are read one
+at a time, statistics are folded incrementally and each chapter is
+written to disk as soon as it is produced. Peak memory tracks the largest
+chapter, not the size of the document.
+"""
+
+import os
+import time
+
+from pdf_processor import (
+    MappedPdf, REOPEN_EVERY_PAGES, chapter_file_name, chapter_pages, iter_page_texts, write_chapter,
+)
+from ai_engine import (
+    StatsAccumulator, analyze, estimate_reading_time, extract_keywords_batch, generate_summary,
+)
+
+
+def stream_document(path: str, chapters: list[dict], out_dir: str, run_ai: bool = True,
+                    reopen_every: int = REOPEN_EVERY_PAGES, progress=None) -> dict:
+    """Split (and optionally analyze) `path` chapter by chapter into out_dir.
+
+    Returns a report dict; chapter entries carry sizes and AI results but
+    never the PDF bytes. `progress(done, total)` is called per chapter.
+    """
+    started = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    doc_stats = StatsAccumulator()
+    entries = []
+    chapter_terms = []  # Term counts per chapter, for TF-IDF keywords at the end
+
+    with MappedPdf(path) as source:
+        reader = source.reader()
+        total_pages = len(reader.pages)
+        seen = bytearray(total_pages)  # Pages already counted in doc_stats (chapters may overlap)
+        image_only = set()
+        pages_since_reopen = 0
+
+        for n, ch in enumerate(chapters, 1):
+            entry = write_chapter(reader, ch, out_path=os.path.join(out_dir, chapter_file_name(ch)))
+            pages = chapter_pages(ch, total_pages)
+            pages_since_reopen += len(pages)
+
+            if run_ai:
+                parts = []
+                for i, text in iter_page_texts(source, pages, reopen_every, reader):
+                    if text is None:
+                        image_only.add(i)
+                        continue
+                    parts.append(text)
+                    if not seen[i]:
+                        seen[i] = 1
+                        doc_stats.add(text)
+                analysis = analyze("\n".join(parts))
+                del parts
+                chapter_terms.append(analysis.term_counts)
+                entry.update({
+                    "summary": generate_summary(analysis),
+                    "reading_time": estimate_reading_time(analysis),
+                    "word_count": analysis.word_count,
+                })
+
+            entries.append(entry)
+            if progress:
+                progress(n, len(chapters))
+            if pages_since_reopen >= reopen_every:
+                reader, pages_since_reopen = source.reader(), 0
+
+    report = {
+        "source": os.path.abspath(path),
+        "total_pages": total_pages,
+        "chapters": entries,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    if run_ai:
+        for entry, keywords in zip(entries, extract_keywords_batch(chapter_terms)):
+            entry["keywords"] = keywords
+        report["stats"] = doc_stats.stats()
+        report["image_only_pages"] = [i + 1 for i in sorted(image_only)]
+    return report
+
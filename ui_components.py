@@ -170,3 +170,23 @@ def render_section(text):
 
 def render_divider():
     st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
+
+
+def render_perf_trace(trace, key):
+    st.markdown(f"**{trace.label}** — `{(trace.seconds or 0) * 1000:,.0f} ms`")
+    st.dataframe(
+        [
+            {
+                "Stage": "· " * s.depth + s.name,
+                "ms": round((s.seconds or 0) * 1000, 1),
+                "Pages": s.pages or None,
+                "KB": round(s.nbytes / 1024, 1) if s.nbytes else None,
+            }
+            for s in trace.stages
+        ],
+        hide_index=True, use_container_width=True,
+    )
+    st.download_button(
+        "⬇️ Export JSON trace", trace.to_json(), f"trace_{key}.json", "application/json",
+        key=f"trace_{key}", use_container_width=True,
+    )